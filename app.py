@@ -2,13 +2,19 @@ import os
 import subprocess
 import time
 import csv
+import json
 import re
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file
 from collections import defaultdict
+from functools import lru_cache
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 import threading
+import queue
 import glob
+import heapq
+import tempfile
 
 app = Flask(__name__)
 app.secret_key = 'elevator_judge_secret_key'
@@ -18,14 +24,37 @@ UPLOAD_FOLDER = 'program'
 LOG_FOLDER = 'log'
 ALLOWED_EXTENSIONS = {'jar'}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB 上传大小限制
+LISTING_CACHE_TTL = 3  # 目录列表缓存时间（秒）
+OUTPUT_TAIL_SIZE = 256 * 1024  # 运行输出每次最多返回的字节数
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 上传文件写盘的分块大小
+STREAM_INTERVAL = 0.25  # 运行输出推送间隔（秒）
+RUN_LOG_KEEP = 5  # 日志目录中保留的运行输出文件数量
+
+# 测试案例名末尾的测试时间，如 xxx-03-31-19-30-18
+_TIME_RE = re.compile(r'-(\d{2}-\d{2}-\d{2}-\d{2}-\d{2})$')
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+# 部署在 nginx/Apache 之后时设置 USE_X_SENDFILE=1，由前端服务器直接发送文件；
+# 否则 send_file 通过 wsgi.file_wrapper 交给服务器（如 gunicorn 使用 sendfile）
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+
+# 新建文件的默认权限（受 umask 影响），上传文件写入临时文件后恢复为该权限
+_umask = os.umask(0)
+os.umask(_umask)
+DEFAULT_FILE_MODE = 0o666 & ~_umask
 
 # 确保目录存在
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(LOG_FOLDER, exist_ok=True)
 
+# 日志目录的绝对路径，只计算一次
+ABS_LOG_FOLDER = os.path.abspath(LOG_FOLDER)
+
+def in_log_folder(abs_path):
+    # 必须是日志目录本身或其下的路径（避免 log2/ 这类前缀误判）
+    return abs_path == ABS_LOG_FOLDER or abs_path.startswith(ABS_LOG_FOLDER + os.sep)
+
 import logging
 
 # 配置日志
@@ -35,15 +64,109 @@ logger = logging.getLogger(__name__)
 app.logger.setLevel(logging.DEBUG) # 确保 Flask app 的 logger 也设置为 DEBUG
 
 # 当前运行状态
+# 运行输出直接写入 log_file，前端按字节偏移增量读取
 running_status = {
     'is_running': False,
-    'output': [],
+    'log_file': None,
     'start_time': None
 }
+# 运行结束时置位，供 /running_status_stream 及时推送最后的输出
+run_finished = threading.Event()
+run_finished.set()
+# 运行任务由单个常驻线程依次执行；run_lock 在提交时获取、任务结束后释放，保证同一时间只有一个任务
+run_jobs = queue.Queue(maxsize=1)
+run_lock = threading.Lock()
+
+# 目录列表缓存：目录路径 -> (生成时间, 列表)
+_listing_cache = {}
+_listing_lock = threading.Lock()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def run_worker():
+    while True:
+        func, args = run_jobs.get()
+        try:
+            func(*args)
+        except Exception:
+            # 任务出错不能终止工作线程，否则之后提交的任务再也不会执行
+            logger.exception('运行任务出错')
+        finally:
+            running_status['is_running'] = False
+            run_finished.set()
+            run_lock.release()
+
+def submit_run(func, *args):
+    # 已有任务在运行或排队时返回 False
+    if not run_lock.acquire(blocking=False):
+        return False
+    run_jobs.put((func, args))
+    return True
+
+threading.Thread(target=run_worker, daemon=True).start()
+
+def new_run_log():
+    # 每次运行一个输出文件，命名与 run.sh 的时间戳格式一致，并加上微秒避免同一秒内的运行重名；
+    # 只保留最近 RUN_LOG_KEEP 个，更早的删除
+    log_file = os.path.join(LOG_FOLDER, f"run-{datetime.now().strftime('%m-%d-%H-%M-%S-%f')}.log")
+    running_status['log_file'] = log_file
+    old_logs = []
+    with os.scandir(LOG_FOLDER) as entries:
+        for entry in entries:
+            if entry.name.startswith('run-') and entry.name.endswith('.log'):
+                try:
+                    old_logs.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass  # 遍历期间已被删除
+    old_logs.sort()
+    for _, old_log in old_logs[:max(0, len(old_logs) - (RUN_LOG_KEEP - 1))]:
+        try:
+            os.remove(old_log)
+        except OSError:
+            pass
+    invalidate_listing(os.path.join(LOG_FOLDER, ''))  # 与 /logs 根目录的缓存键一致
+    return log_file
+
+def append_output(line):
+    with open(running_status['log_file'], 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+
+def read_output(log_file, offset=-1):
+    # 读取 offset 之后新增的完整行，返回 (文本, 新偏移)；offset 无效或落后太多时只返回末尾部分
+    if not log_file or not os.path.isfile(log_file):
+        return '', 0
+    with open(log_file, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        skip_partial = False
+        if offset < 0 or offset > size or size - offset > OUTPUT_TAIL_SIZE:
+            offset = max(0, size - OUTPUT_TAIL_SIZE)
+            skip_partial = offset > 0
+        f.seek(offset)
+        data = f.read(size - offset)
+    begin = 0
+    if skip_partial:
+        begin = data.find(b'\n') + 1  # 丢弃被截断的首行
+    end = len(data) if not running_status['is_running'] else data.rfind(b'\n') + 1
+    end = max(begin, end)
+    return data[begin:end].decode('utf-8', errors='replace'), offset + end
+
+def get_cached_listing(path):
+    # 缓存未过期时直接返回，避免轮询页面反复遍历目录
+    with _listing_lock:
+        hit = _listing_cache.get(path)
+    if hit and time.monotonic() - hit[0] < LISTING_CACHE_TTL:
+        return hit[1]
+    return None
+
+def set_cached_listing(path, listing):
+    with _listing_lock:
+        _listing_cache[path] = (time.monotonic(), listing)
+
+def invalidate_listing(path):
+    with _listing_lock:
+        _listing_cache.pop(path, None)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -53,28 +176,29 @@ def jar_manager():
     page = request.args.get('page', 1, type=int)
     per_page = 10  # 每页显示的文件数量
     
-    # 获取JAR文件列表
-    jar_files = []
-    for filename in os.listdir(UPLOAD_FOLDER):
-        if filename.endswith('.jar'):
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            file_size = os.path.getsize(filepath)
-            file_date = datetime.fromtimestamp(os.path.getmtime(filepath))
-            jar_files.append({
-                'name': filename,
-                'size': file_size,
-                'size_formatted': format_size(file_size),
-                'date': file_date.strftime('%Y-%m-%d %H:%M:%S')
-            })
-    
-    # 按上传时间倒序排序
-    jar_files.sort(key=lambda x: x['date'], reverse=True)
+    # 获取JAR文件列表，只记录 (修改时间, 文件名, 大小)
+    jar_files = get_cached_listing(UPLOAD_FOLDER)
+    if jar_files is None:
+        jar_files = []
+        with os.scandir(UPLOAD_FOLDER) as entries:
+            for entry in entries:
+                if entry.name.endswith('.jar'):
+                    st = entry.stat()  # 一次 stat 同时取大小和修改时间
+                    jar_files.append((st.st_mtime, entry.name, st.st_size))
+        set_cached_listing(UPLOAD_FOLDER, jar_files)
     
-    # 分页
+    # 分页：按上传时间倒序只取到当前页为止的文件，只格式化当前页
     total_pages = (len(jar_files) + per_page - 1) // per_page
     start_idx = (page - 1) * per_page
     end_idx = start_idx + per_page
-    jar_files_paged = jar_files[start_idx:end_idx]
+    jar_files_paged = []
+    for mtime, name, size in heapq.nlargest(end_idx, jar_files)[start_idx:]:
+        jar_files_paged.append({
+            'name': name,
+            'size': size,
+            'size_formatted': format_size(size),
+            'date': format_mtime(int(mtime))
+        })
     
     return render_template(
         'jar_manager.html', 
@@ -104,23 +228,75 @@ def upload_file():
             flash(f'文件 {filename} 已存在', 'error')
             return redirect(url_for('jar_manager'))
         
-        # 保存文件
-        file.save(file_path)
+        # 保存文件，并发上传同名文件时不覆盖
+        try:
+            save_stream(file.stream, file_path)
+        except FileExistsError:
+            flash(f'文件 {filename} 已存在', 'error')
+            return redirect(url_for('jar_manager'))
         flash(f'文件 {filename} 上传成功', 'success')
         return redirect(url_for('jar_manager'))
     else:
         flash('不支持的文件类型，只允许上传JAR文件', 'error')
         return redirect(url_for('jar_manager'))
 
+@app.route('/upload/<filename>', methods=['PUT'])
+def upload_file_stream(filename):
+    # 直接读取请求体写入磁盘，不经过表单解析，如 curl -T xxx.jar .../upload/xxx.jar
+    if not allowed_file(filename):
+        return jsonify({'error': '不支持的文件类型，只允许上传JAR文件'}), 400
+    filename = secure_filename(filename)
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if os.path.exists(file_path):
+        return jsonify({'error': f'文件 {filename} 已存在'}), 409
+    # Werkzeug 2.0 不会对 request.stream 应用 MAX_CONTENT_LENGTH，需自行检查
+    content_length = request.content_length
+    if content_length is None:
+        return jsonify({'error': '缺少 Content-Length，不支持分块上传'}), 411
+    if content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': '文件过大'}), 413
+    try:
+        save_stream(request.stream, file_path)
+    except RequestEntityTooLarge:
+        return jsonify({'error': '文件过大'}), 413
+    except FileExistsError:
+        return jsonify({'error': f'文件 {filename} 已存在'}), 409
+    return jsonify({'name': filename}), 201
+
+def save_stream(stream, file_path):
+    # 按 1MB 分块写入上传目录中的临时文件，超过大小限制时中止；
+    # 完整写入后硬链接到目标文件（目标已存在时抛出 FileExistsError，不覆盖），
+    # 最后总是删除临时文件，不留下不完整的 jar
+    max_size = app.config['MAX_CONTENT_LENGTH']
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            size = 0
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise RequestEntityTooLarge()
+                f.write(chunk)
+        # mkstemp 创建的文件为 0600，改为与直接新建文件相同的权限
+        os.chmod(tmp_path, DEFAULT_FILE_MODE)
+        os.link(tmp_path, file_path)
+    finally:
+        os.remove(tmp_path)
+    invalidate_listing(UPLOAD_FOLDER)
+
 @app.route('/download/<filename>')
 def download_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True)
+    return send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True, conditional=True)
 
 @app.route('/delete/<filename>', methods=['POST'])
 def delete_file(filename):
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     if os.path.exists(file_path):
         os.remove(file_path)
+        invalidate_listing(UPLOAD_FOLDER)
         flash(f'文件 {filename} 已删除', 'success')
     else:
         flash(f'文件 {filename} 不存在', 'error')
@@ -153,120 +329,119 @@ def run_program():
             flash('迭代次数必须大于0', 'error')
             return redirect(url_for('run_program'))
         
-        # 启动线程运行程序
-        threading.Thread(target=run_script, args=(num_iterations, num_requests, time_limit, duplicate_times, num_schedule, update_times)).start()
+        # 提交给运行线程
+        if not submit_run(run_script, num_iterations, num_requests, time_limit, duplicate_times, num_schedule, update_times):
+            flash('已有程序在运行，请等待完成', 'error')
+            return redirect(url_for('run_program'))
         
         flash('程序已开始运行，请等待结果', 'success')
         return redirect(url_for('run_program'))
     
+    output, _ = read_output(running_status['log_file'])
     return render_template('run_program.html', 
                           is_running=running_status['is_running'],
-                          output=running_status['output'],
+                          output=output.splitlines(),
                           start_time=running_status['start_time'])
 
 @app.route('/run_custom_input', methods=['POST'])
 def run_custom_input():
-    if running_status['is_running']:
+    # Hold the run lock before touching stdin.txt so a running job's input is never overwritten
+    if not run_lock.acquire(blocking=False):
         flash('已有程序在运行，请等待完成', 'error')
         return redirect(url_for('run_program'))
     
-    # Get custom input from form
-    custom_input = request.form.get('custom_input', '')
-    
-    # 将所有换行符统一为\n
-    custom_input = custom_input.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Save to stdin.txt
-    with open('stdin.txt', 'w') as f:
-        f.write(custom_input)
+    try:
+        # Get custom input from form
+        custom_input = request.form.get('custom_input', '')
+        
+        # 将所有换行符统一为\n
+        custom_input = custom_input.replace('\r\n', '\n').replace('\r', '\n')
+        
+        # Save to stdin.txt
+        with open('stdin.txt', 'w') as f:
+            f.write(custom_input)
+    except Exception:
+        run_lock.release()
+        raise
     
-    # Start thread to run the script with custom input
-    threading.Thread(target=run_custom_script).start()
+    # Hand the job to the run worker, which releases the lock when done
+    run_jobs.put((run_custom_script, ()))
     
     flash('程序已开始运行，请等待结果', 'success')
     return redirect(url_for('run_program'))
 
 def run_custom_script():
     # Update running status
+    run_finished.clear()
     running_status['is_running'] = True
-    running_status['output'] = []
-    running_status['start_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     try:
+        log_file = new_run_log()
+        running_status['start_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
         # Run with custom input (USER_INPUT=1)
         cmd = "./run.sh 1 0 0 0 0 0 1"
         
-        # Run command and get output in real-time
-        process = subprocess.Popen(
-            cmd, 
-            shell=True, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
-        )
-        
-        # Read output
-        for line in process.stdout:
-            line = line.strip()
-            running_status['output'].append(line)
-        
-        # Wait for process to finish
-        process.wait()
+        # Output goes straight to the log file, no reading loop needed
+        with open(log_file, 'wb') as f:
+            process = subprocess.Popen(
+                cmd, 
+                shell=True, 
+                stdout=f, 
+                stderr=subprocess.STDOUT
+            )
+            
+            # Wait for process to finish
+            process.wait()
         
         if process.returncode != 0:
-            running_status['output'].append(f"程序退出，返回代码：{process.returncode}")
+            append_output(f"程序退出，返回代码：{process.returncode}")
     except Exception as e:
-        running_status['output'].append(f"发生错误：{str(e)}")
+        append_output(f"发生错误：{str(e)}")
     finally:
         running_status['is_running'] = False
+        run_finished.set()
 
 def run_script(num_iterations, num_requests, time_limit, duplicate_times, num_schedule, update_times):
     # 更新运行状态
+    run_finished.clear()
     running_status['is_running'] = True
-    running_status['output'] = []
-    running_status['start_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     try:
+        log_file = new_run_log()
+        running_status['start_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
         # 构建命令
         cmd = f"./run.sh {num_iterations} {num_requests} {time_limit} {duplicate_times} {num_schedule} {update_times}"
         
-        # 运行命令并实时获取输出
-        process = subprocess.Popen(
-            cmd, 
-            shell=True, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
-        )
-        
-        # 读取输出
-        for line in process.stdout:
-            line = line.strip()
-            running_status['output'].append(line)
-        
-        # 等待进程结束
-        process.wait()
+        # 运行命令，输出由内核直接写入日志文件
+        with open(log_file, 'wb') as f:
+            process = subprocess.Popen(
+                cmd, 
+                shell=True, 
+                stdout=f, 
+                stderr=subprocess.STDOUT
+            )
+            
+            # 等待进程结束
+            process.wait()
         
         if process.returncode != 0:
-            running_status['output'].append(f"程序退出，返回代码：{process.returncode}")
+            append_output(f"程序退出，返回代码：{process.returncode}")
     except Exception as e:
-        running_status['output'].append(f"发生错误：{str(e)}")
+        append_output(f"发生错误：{str(e)}")
     finally:
         running_status['is_running'] = False
+        run_finished.set()
 
 @app.route('/logs')
 def logs():
     path = request.args.get('path', '')
     
     # 安全检查：确保路径在LOG_FOLDER内
-    abs_base_path = os.path.abspath(LOG_FOLDER)
     abs_path = os.path.abspath(os.path.join(LOG_FOLDER, path))
     
-    if not abs_path.startswith(abs_base_path):
+    if not in_log_folder(abs_path):
         flash('非法路径访问', 'error')
         return redirect(url_for('logs'))
     
@@ -285,29 +460,37 @@ def logs():
     
     # 获取当前目录内容
     current_path = os.path.join(LOG_FOLDER, rel_path)
-    items = []
+    items = get_cached_listing(current_path)
     
-    if os.path.isdir(current_path):
+    if items is None:
+        if not os.path.isdir(current_path):
+            # 处理文件
+            flash('请求的路径不是目录', 'error')
+            return redirect(url_for('logs'))
+        
         # 处理目录
-        for item in sorted(os.listdir(current_path)):
-            item_path = os.path.join(current_path, item)
-            item_rel_path = os.path.join(rel_path, item) if rel_path else item
+        items = []
+        with os.scandir(current_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        # 相对路径前缀只计算一次，逐项直接拼接文件名
+        prefix = rel_path + os.sep if rel_path else ''
+        for entry in entries:
+            item = entry.name
+            item_rel_path = prefix + item
             
-            is_dir = os.path.isdir(item_path)
-            size = os.path.getsize(item_path) if not is_dir else 0
-            mod_time = datetime.fromtimestamp(os.path.getmtime(item_path))
+            # DirEntry 缓存了 readdir 的类型信息，stat 结果复用于大小和修改时间
+            is_dir = entry.is_dir()
+            st = entry.stat()
+            size = st.st_size if not is_dir else 0
             
             items.append({
                 'name': item,
                 'path': item_rel_path,
                 'is_dir': is_dir,
                 'size': format_size(size),
-                'modified': mod_time.strftime('%Y-%m-%d %H:%M:%S')
+                'modified': format_mtime(int(st.st_mtime))
             })
-    else:
-        # 处理文件
-        flash('请求的路径不是目录', 'error')
-        return redirect(url_for('logs'))
+        set_cached_listing(current_path, items)
     
     return render_template('logs.html',
                            os=os,
@@ -320,10 +503,9 @@ def download_log():
     path = request.args.get('path', '')
     
     # 安全检查
-    abs_base_path = os.path.abspath(LOG_FOLDER)
     abs_path = os.path.abspath(os.path.join(LOG_FOLDER, path))
     
-    if not abs_path.startswith(abs_base_path):
+    if not in_log_folder(abs_path):
         flash('非法路径访问', 'error')
         return redirect(url_for('logs'))
     
@@ -337,25 +519,63 @@ def download_log():
         flash('不允许下载此类型的文件', 'error')
         return redirect(url_for('logs', path=os.path.dirname(path)))
     
-    # 发送文件
-    return send_file(abs_path, as_attachment=True)
+    # 发送文件，conditional 支持 Range 和 304
+    return send_file(abs_path, as_attachment=True, conditional=True)
+
+def status_snapshot(log, offset):
+    # log 和 offset 为客户端当前读取的日志及位置，只返回之后新增的内容
+    is_running = running_status['is_running']
+    log_file = running_status['log_file']
+    log_name = os.path.basename(log_file) if log_file else None
+    if log != log_name:
+        offset = -1  # 新一轮运行已开始，从头读取
+    data, offset = read_output(log_file, offset)
+    return {
+        'is_running': is_running,
+        'log': log_name,
+        'data': data,
+        'offset': offset,
+        'start_time': running_status['start_time']
+    }
 
 @app.route('/running_status')
 def get_running_status():
-    return jsonify({
-        'is_running': running_status['is_running'],
-        'output': running_status['output'],
-        'start_time': running_status['start_time']
-    })
+    return jsonify(status_snapshot(request.args.get('log'),
+                                   request.args.get('offset', -1, type=int)))
 
+@app.route('/running_status_stream')
+def running_status_stream():
+    # Server-Sent Events：只在有新输出或状态变化时推送，运行结束后关闭连接
+    log = request.args.get('log')
+    offset = request.args.get('offset', -1, type=int)
+    
+    def generate():
+        status = status_snapshot(log, offset)
+        yield f"data: {json.dumps(status)}\n\n"
+        while status['is_running']:
+            run_finished.wait(STREAM_INTERVAL)
+            last = status
+            status = status_snapshot(last['log'], last['offset'])
+            if status['data'] or status['log'] != last['log'] or not status['is_running']:
+                yield f"data: {json.dumps(status)}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@lru_cache(maxsize=4096)
 def format_size(size):
-    # 格式化文件大小显示
+    # 格式化文件大小显示，相同大小的结果会被缓存
     for unit in ['B', 'KB', 'MB', 'GB']:
         if size < 1024.0:
             return f"{size:.2f} {unit}"
         size /= 1024.0
     return f"{size:.2f} TB"
 
+@lru_cache(maxsize=4096)
+def format_mtime(seconds):
+    # 格式化修改时间（精确到秒），同一秒内的文件共用结果
+    return datetime.fromtimestamp(seconds).strftime('%Y-%m-%d %H:%M:%S')
+
 @app.route('/chart')
 def chart():
     """渲染性能分析图表页面"""
@@ -373,48 +593,42 @@ def chart_data():
         return jsonify({'error': 'No data available'})
     
     try:
-        # 读取CSV文件
-        with open(result_file, 'r', encoding='utf-8') as f:
+        # 逐行读取CSV文件并按测试时间分组，每组按测试对象索引
+        # 第一行是标题: 测试案例,系统运行时间(Tmax),平均完成时间(WT),系统耗电量(W),ARRIVE操作次数,OPEN操作次数,CLOSE操作次数,完成乘客数
+        test_runs = defaultdict(dict)
+        has_rows = False
+        with open(result_file, 'r', encoding='utf-8', newline='') as f:
             reader = csv.reader(f)
-            rows = list(reader)
+            next(reader, None)  # 跳过标题行
+            for row in reader:
+                has_rows = True
+                if not row or not row[0]:  # 忽略空测试案例
+                    continue
+                    
+                # 提取测试对象和测试时间
+                test_case = row[0]
+                time_match = _TIME_RE.search(test_case)
+            
+                if time_match:
+                    test_time = time_match.group(1)  # 提取时间部分
+                    test_object = test_case.replace('-' + test_time, '')  # 提取测试对象部分
+                
+                    # 将数据添加到对应的测试时间组，同一对象重复出现时保留第一条
+                    test_runs[test_time].setdefault(test_object, {
+                        'test_object': test_object,
+                        'tmax': float(row[1]) if row[1] else 0,
+                        'wt': float(row[2]) if row[2] else 0,
+                        'w': float(row[3]) if row[3] else 0,
+                        'arrive': int(row[4]) if row[4] else 0,
+                        'open': int(row[5]) if row[5] else 0,
+                        'close': int(row[6]) if row[6] else 0,
+                        'completed_passengers': row[7] if row[7] else '0/0'
+                    })
         
         # 如果文件为空或只有标题行
-        if len(rows) <= 1:
+        if not has_rows:
             return jsonify({'error': 'No data available'})
         
-        # 解析数据
-        # 第一行是标题: 测试案例,系统运行时间(Tmax),平均完成时间(WT),系统耗电量(W),ARRIVE操作次数,OPEN操作次数,CLOSE操作次数,完成乘客数
-        headers = rows[0]
-        data = rows[1:]  # 跳过标题行
-        
-        # 按测试时间分组
-        time_pattern = r'-(\d{2}-\d{2}-\d{2}-\d{2}-\d{2})$'
-        test_runs = defaultdict(list)
-        
-        for row in data:
-            if not row[0]:  # 忽略空测试案例
-                continue
-                
-            # 提取测试对象和测试时间
-            test_case = row[0]
-            time_match = re.search(time_pattern, test_case)
-            
-            if time_match:
-                test_time = time_match.group(1)  # 提取时间部分
-                test_object = test_case.replace('-' + test_time, '')  # 提取测试对象部分
-                
-                # 将数据添加到对应的测试时间组
-                test_runs[test_time].append({
-                    'test_object': test_object,
-                    'tmax': float(row[1]) if row[1] else 0,
-                    'wt': float(row[2]) if row[2] else 0,
-                    'w': float(row[3]) if row[3] else 0,
-                    'arrive': int(row[4]) if row[4] else 0,
-                    'open': int(row[5]) if row[5] else 0,
-                    'close': int(row[6]) if row[6] else 0,
-                    'completed_passengers': row[7] if row[7] else '0/0'
-                })
-        
         # 按时间倒序排序并取最近15次运行
         sorted_times = sorted(test_runs.keys(), reverse=False)
         if len(sorted_times) < 15:
@@ -435,8 +649,7 @@ def chart_data():
         # 获取所有测试对象
         all_test_objects = set()
         for time in recent_times:
-            for run in test_runs[time]:
-                all_test_objects.add(run['test_object'])
+            all_test_objects.update(test_runs[time])
         
         # 将测试对象转换为列表并排序
         test_objects_list = sorted(list(all_test_objects))
@@ -454,20 +667,16 @@ def chart_data():
             result['runs'].append(time)  # 添加测试时间
             
             # 为每个测试对象查找对应的数据
+            runs_by_object = test_runs[time]
             for obj_idx, test_object in enumerate(test_objects_list):
-                found = False
-                
-                for run in test_runs[time]:
-                    if run['test_object'] == test_object:
-                        result['tmax'][obj_idx].append(run['tmax'])
-                        result['wt'][obj_idx].append(run['wt'])
-                        result['w'][obj_idx].append(run['w'])
-                        result['completedPassengers'][obj_idx].append(run['completed_passengers'])
-                        found = True
-                        break
-                
-                # 如果没有找到该测试对象的数据，填充null
-                if not found:
+                run = runs_by_object.get(test_object)
+                if run:
+                    result['tmax'][obj_idx].append(run['tmax'])
+                    result['wt'][obj_idx].append(run['wt'])
+                    result['w'][obj_idx].append(run['w'])
+                    result['completedPassengers'][obj_idx].append(run['completed_passengers'])
+                else:
+                    # 如果没有找到该测试对象的数据，填充null
                     result['tmax'][obj_idx].append(None)
                     result['wt'][obj_idx].append(None)
                     result['w'][obj_idx].append(None)
@@ -3,25 +3,31 @@ import argparse
 import random
 import sys
 from typing import List, Tuple, Set, Dict
-from collections import defaultdict
+from operator import itemgetter
 # --- Constants ---
 FLOORS = ["B4", "B3", "B2", "B1", "F1", "F2", "F3", "F4", "F5", "F6", "F7"]
 FLOOR_MAP = {name: i for i, name in enumerate(FLOORS)} # Map floor name to index for easier comparison
+# Candidate floors for get_random_floor, keyed by the excluded floor (None excludes nothing)
+FLOORS_EXCLUDING = {f: tuple(x for x in FLOORS if x != f) for f in FLOORS + [None]}
 ELEVATOR_IDS = list(range(1, 7))
-SCHE_TARGET_FLOORS = ["B2", "B1", "F1", "F2", "F3", "F4", "F5"]
-SCHE_SPEEDS = [0.2, 0.3, 0.4, 0.5]
-UPDATE_TARGET_FLOORS = ["B2", "B1", "F1", "F2", "F3", "F4", "F5"]
+ELEVATOR_ID_SET = frozenset(ELEVATOR_IDS)
+SCHE_TARGET_FLOORS = ("B2", "B1", "F1", "F2", "F3", "F4", "F5")
+SCHE_SPEEDS = (0.2, 0.3, 0.4, 0.5)
+UPDATE_TARGET_FLOORS = ("B2", "B1", "F1", "F2", "F3", "F4", "F5")
 MIN_SCHE_UPDATE_INTERVAL = 8.0
 MIN_START_TIME = 1.0
 MAX_STRONG_SCHE = 20
 MAX_MUTUAL_COMMANDS = 70
 MAX_UPDATE_TIMES = 3 # Implicit limit based on 6 elevators
+# Command kinds, tagged when a command is generated
+KIND_PASSENGER = 0
+KIND_SCHE = 1
+KIND_UPDATE = 2
 
 # --- Helper Functions ---
 def get_random_floor(exclude: str = None) -> str:
     """Gets a random floor, optionally excluding one."""
-    choices = [f for f in FLOORS if f != exclude]
-    return random.choice(choices)
+    return random.choice(FLOORS_EXCLUDING[exclude])
 
 def format_command(timestamp: float, command: str) -> str:
     """Formats the command string with timestamp."""
@@ -41,47 +47,49 @@ def generate_input(mode: str, request_num: int, duplicate_times: int,
          print(f"Warning: update_times ({update_times}) exceeds maximum possible ({MAX_UPDATE_TIMES}). Setting to {MAX_UPDATE_TIMES}.", file=sys.stderr)
          update_times = MAX_UPDATE_TIMES
 
-    commands: List[Tuple[float, str]] = []
+    commands: List[Tuple[float, int, str]] = [] # (timestamp, kind, command)
     passenger_id_counter = 1
-    last_sche_update_time = defaultdict(int)
-    update_time = defaultdict(int)
-    updated_elevators: Set[int] = set()
+    # Per-elevator times, indexed by elevator id (index 0 unused)
+    last_sche_update_time = [0.0] * (len(ELEVATOR_IDS) + 1)
+    update_time = [float('inf')] * (len(ELEVATOR_IDS) + 1) # inf: elevator is never updated
+    available_elevators: Set[int] = set(ELEVATOR_ID_SET) # Elevators not involved in any UPDATE yet
     sched_elevators_mutual: Set[int] = set() # Only for mutual mode constraint
 
-    # 1. Generate Base Passenger Requests
-    base_requests = []
-    for _ in range(request_num):
-        from_floor = get_random_floor()
-        to_floor = get_random_floor(exclude=from_floor)
-        priority = random.randint(1, 100)
-        # Assign a preliminary timestamp for sorting later, will be refined
-        timestamp = random.uniform(MIN_START_TIME, time_limit)
-        base_requests.append({
-            "from": from_floor, "to": to_floor, "priority": priority, "base_time": timestamp
-        })
+    # 1. Generate Base Passenger Requests (each field drawn in bulk)
+    from_floors = random.choices(FLOORS, k=request_num)
+    to_floors = random.choices(FLOORS, k=request_num)
+    for i, from_floor in enumerate(from_floors):
+        if to_floors[i] == from_floor: # Redraw collisions only
+            to_floors[i] = get_random_floor(exclude=from_floor)
+    priorities = random.choices(range(1, 101), k=request_num)
+    # Assign a preliminary timestamp for sorting later, will be refined
+    base_times = [random.uniform(MIN_START_TIME, time_limit) for _ in range(request_num)]
+    base_requests = [
+        {"from": from_floor, "to": to_floor, "priority": priority, "base_time": timestamp}
+        for from_floor, to_floor, priority, timestamp in zip(from_floors, to_floors, priorities, base_times)
+    ]
 
     # 2. Duplicate Passenger Requests
     for base_req in base_requests:
+        # Everything after the passenger id is shared by all copies, format it once
+        suffix = f"-PRI-{base_req['priority']}-FROM-{base_req['from']}-TO-{base_req['to']}"
+        low, high = base_req["base_time"] * 0.9, base_req["base_time"] * 1.1
         for _ in range(duplicate_times):
             # Refine timestamp: ensure it's around base_time but non-decreasing overall later
-            timestamp = max(MIN_START_TIME, random.uniform(base_req["base_time"] * 0.9, base_req["base_time"] * 1.1))
+            timestamp = max(MIN_START_TIME, random.uniform(low, high))
             timestamp = min(time_limit, timestamp) # Ensure within limit
 
-            command_str = (f"{passenger_id_counter}-PRI-{base_req['priority']}"
-                           f"-FROM-{base_req['from']}-TO-{base_req['to']}")
-            commands.append((timestamp, command_str))
+            commands.append((timestamp, KIND_PASSENGER, f"{passenger_id_counter}{suffix}"))
             passenger_id_counter += 1
 
     # 3. Generate UPDATE Requests
     actual_update_times = 0
-    available_for_update = list(set(ELEVATOR_IDS) - updated_elevators)
-
     for _ in range(update_times):
-        if len(available_for_update) < 2:
+        if len(available_elevators) < 2:
             print(f"Warning: Not enough available elevators for UPDATE request. Generated {actual_update_times}.", file=sys.stderr)
             break
 
-        elevator_a, elevator_b = random.sample(available_for_update, 2)
+        elevator_a, elevator_b = random.sample(tuple(available_elevators), 2)
         target_floor = random.choice(UPDATE_TARGET_FLOORS)
 
         # Ensure time constraints
@@ -94,39 +102,32 @@ def generate_input(mode: str, request_num: int, duplicate_times: int,
              break
 
         command_str = f"UPDATE-{elevator_a}-{elevator_b}-{target_floor}"
-        commands.append((timestamp, command_str))
+        commands.append((timestamp, KIND_UPDATE, command_str))
         update_time[elevator_a] = timestamp
         update_time[elevator_b] = timestamp
         actual_update_times += 1
 
-        # Remove updated elevators from available lists
-        updated_elevators.add(elevator_a)
-        updated_elevators.add(elevator_b)
-        available_for_update.remove(elevator_a)
-        available_for_update.remove(elevator_b)
-        # if elevator_a in available_for_sche: available_for_sche.remove(elevator_a)
-        # if elevator_b in available_for_sche: available_for_sche.remove(elevator_b)
+        # Remove updated elevators from the available set (also excludes them from SCHE)
+        available_elevators.discard(elevator_a)
+        available_elevators.discard(elevator_b)
         if mode == 'mutual':
-             if elevator_a in sched_elevators_mutual: sched_elevators_mutual.remove(elevator_a)
-             if elevator_b in sched_elevators_mutual: sched_elevators_mutual.remove(elevator_b)
+             sched_elevators_mutual.discard(elevator_a)
+             sched_elevators_mutual.discard(elevator_b)
              
     # 4. Generate SCHE Requests
     actual_sche_times = 0
     max_sche = MAX_STRONG_SCHE if mode == 'strong' else len(ELEVATOR_IDS) # Mutual: max 1 per elevator
     sche_limit = min(sche_times, max_sche)
 
-    available_for_sche = list(set(ELEVATOR_IDS) - updated_elevators)
     if mode == 'mutual':
-        available_for_sche = list(set(available_for_sche) - sched_elevators_mutual)
+        available_for_sche = tuple(available_elevators - sched_elevators_mutual)
+    else:
+        available_for_sche = tuple(available_elevators)
 
-    random.shuffle(available_for_sche)
-    
-    for i in range(sche_limit):
-        if not available_for_sche:
-            print(f"Warning: Not enough available elevators for {sche_limit} SCHE requests. Generated {actual_sche_times}.", file=sys.stderr)
-            break
+    # Each elevator gets at most one SCHE; draw only as many as needed
+    picks = random.sample(available_for_sche, min(sche_limit, len(available_for_sche)))
 
-        elevator_id = available_for_sche.pop()
+    for elevator_id in picks:
         target_floor = random.choice(SCHE_TARGET_FLOORS)
         speed = random.choice(SCHE_SPEEDS)
 
@@ -140,51 +141,56 @@ def generate_input(mode: str, request_num: int, duplicate_times: int,
              break
 
         command_str = f"SCHE-{elevator_id}-{speed}-{target_floor}"
-        commands.append((timestamp, command_str))
+        commands.append((timestamp, KIND_SCHE, command_str))
         last_sche_update_time[elevator_id] = timestamp
         actual_sche_times += 1
         if mode == 'mutual':
             sched_elevators_mutual.add(elevator_id)
+    else:
+        if len(picks) < sche_limit:
+            print(f"Warning: Not enough available elevators for {sche_limit} SCHE requests. Generated {actual_sche_times}.", file=sys.stderr)
 
 
     # 5. Sort and Finalize Commands
-    commands.sort(key=lambda x: x[0])
+    commands.sort(key=itemgetter(0))
 
     # Ensure timestamps are strictly non-decreasing after sort and apply final formatting
     final_commands: List[str] = []
     current_time = 0.0
-    for i, (ts, cmd) in enumerate(commands):
+    last_index = len(commands) - 1
+    prev_ts = 0.0
+    is_prev_sche_update = False # The first command has no predecessor
+    mutual = mode == 'mutual'
+    for i, (ts, kind, cmd) in enumerate(commands):
         # Ensure non-decreasing timestamp, respecting MIN_START_TIME
         adjusted_ts = max(MIN_START_TIME, ts, current_time)
-        # Ensure interval for SCHE/UPDATE if it's the first command or previous wasn't SCHE/UPDATE
-        is_sche_update = cmd.startswith("SCHE") or cmd.startswith("UPDATE")
-        if i > 0 and is_sche_update:
-             prev_ts, prev_cmd = commands[i-1]
-             is_prev_sche_update = prev_cmd.startswith("SCHE") or prev_cmd.startswith("UPDATE")
-             if is_prev_sche_update:
-                  adjusted_ts = max(adjusted_ts, round(prev_ts + MIN_SCHE_UPDATE_INTERVAL, 1))
+        # Ensure interval for SCHE/UPDATE if the previous command (by sorted time) was SCHE/UPDATE too
+        is_sche_update = kind != KIND_PASSENGER
+        if is_sche_update and is_prev_sche_update:
+             adjusted_ts = max(adjusted_ts, round(prev_ts + MIN_SCHE_UPDATE_INTERVAL, 1))
+        prev_ts, is_prev_sche_update = ts, is_sche_update
 
         # Ensure timestamp is within the overall limit
         adjusted_ts = min(time_limit, adjusted_ts)
 
         # Check mutual mode command limit
-        if mode == 'mutual' and len(final_commands) >= MAX_MUTUAL_COMMANDS:
+        if mutual and len(final_commands) >= MAX_MUTUAL_COMMANDS:
              print(f"Warning: Reached mutual mode command limit ({MAX_MUTUAL_COMMANDS}). Truncating.", file=sys.stderr)
              break
 
         # Check mutual mode time limits
-        if mode == 'mutual':
+        if mutual:
             if adjusted_ts < 1.0: # Should be handled by max(MIN_START_TIME, ...)
                 adjusted_ts = 1.0
             if adjusted_ts > 70.0:
                  print(f"Warning: Command timestamp {adjusted_ts:.1f} exceeds mutual mode time limit (70.0). Truncating.", file=sys.stderr)
                  break # Stop adding commands if time limit exceeded
 
-        final_commands.append(format_command(round(adjusted_ts, 1), cmd))
         current_time = round(adjusted_ts, 1) # Update current time based on the written command
+        final_commands.append(format_command(current_time, cmd))
 
         # If we adjusted the time significantly, we might violate the time_limit for subsequent commands
-        if current_time >= time_limit and i < len(commands) - 1:
+        if current_time >= time_limit and i < last_index:
              print(f"Warning: Timestamp adjustments reached time limit ({time_limit}). Further commands truncated.", file=sys.stderr)
              break
 
@@ -192,8 +198,8 @@ def generate_input(mode: str, request_num: int, duplicate_times: int,
     # 6. Write to Output File
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
-            for line in final_commands:
-                f.write(line + '\n')
+            if final_commands:
+                f.write('\n'.join(final_commands) + '\n')
         print(f"Successfully generated {len(final_commands)} commands to {output_file}")
     except IOError as e:
         print(f"Error writing to file {output_file}: {e}", file=sys.stderr)
@@ -4,7 +4,7 @@ import math
 import re
 import sys
 from collections import defaultdict, deque
-from enum import Enum, auto
+from enum import IntEnum
 from typing import Dict, List, Optional, Set, Tuple, Any
 
 # --- Constants ---
@@ -12,6 +12,7 @@ FLOORS = ["B4", "B3", "B2", "B1", "F1", "F2", "F3", "F4", "F5", "F6", "F7"]
 FLOOR_MAP = {name: i for i, name in enumerate(FLOORS)}
 FLOOR_NAMES = {i: name for i, name in enumerate(FLOORS)}
 NUM_FLOORS = len(FLOORS)
+INITIAL_FLOOR_IDX = FLOOR_MAP["F1"] # Every elevator starts at F1
 ELEVATOR_IDS = set(range(1, 7))
 DEFAULT_SPEED = 0.4
 MIN_DOOR_TIME = 0.4 - 1e-6 # Tolerance for float comparison
@@ -23,26 +24,44 @@ UPDATE_COMPLETE_TIMEOUT = 6.0 + 1e-6
 TIME_PRECISION = 1e-6 # Tolerance for float comparisons
 
 # --- Enums ---
-class ElevatorMode(Enum):
-    NORMAL = auto()
-    SCHE_PENDING = auto() # Received SCHE, waiting to begin
-    SCHE_MOVING = auto()  # Moving to target floor
-    SCHE_STOPPING = auto() # Arrived at target, door opened, waiting
-    UPDATE_PENDING = auto() # Received UPDATE, waiting to begin
-    UPDATING = auto()     # Between BEGIN and END
-    DOUBLE_A = auto()     # Upper carriage in double mode
-    DOUBLE_B = auto()     # Lower carriage in double mode
-    DISABLED = auto()     #井道 A 停用
-
-class PassengerStatus(Enum):
-    OUTSIDE = auto()      # Initial state
-    WAITING = auto()      # Received by an elevator
-    INSIDE = auto()       # Inside an elevator
-    COMPLETED = auto()    # Reached destination (OUT-S)
-    FAILED_OUT = auto()   # Left mid-way (OUT-F) or due to SCHE/UPDATE
+# Values are distinct bits so that several modes/statuses can be tested with one mask.
+class ElevatorMode(IntEnum):
+    NORMAL = 1
+    SCHE_PENDING = 2      # Received SCHE, waiting to begin
+    SCHE_MOVING = 4       # Moving to target floor
+    SCHE_STOPPING = 8     # Arrived at target, door opened, waiting
+    UPDATE_PENDING = 16   # Received UPDATE, waiting to begin
+    UPDATING = 32         # Between BEGIN and END
+    DOUBLE_A = 64         # Upper carriage in double mode
+    DOUBLE_B = 128        # Lower carriage in double mode
+    DISABLED = 256        #井道 A 停用
+
+class PassengerStatus(IntEnum):
+    OUTSIDE = 1           # Initial state
+    WAITING = 2           # Received by an elevator
+    INSIDE = 4            # Inside an elevator
+    COMPLETED = 8         # Reached destination (OUT-S)
+    FAILED_OUT = 16       # Left mid-way (OUT-F) or due to SCHE/UPDATE
+
+NO_MOVE_MODES = ElevatorMode.UPDATING | ElevatorMode.DISABLED
+DOUBLE_MODES = ElevatorMode.DOUBLE_A | ElevatorMode.DOUBLE_B
+RECEIVABLE_STATUSES = PassengerStatus.OUTSIDE | PassengerStatus.FAILED_OUT
+# Modes in which an elevator may not perform an action; each check_* tests this mask once
+# and only works out which message to report when it is hit.
+ACTION_FORBIDDEN_MODES = {
+    "ARRIVE": ElevatorMode.UPDATING | ElevatorMode.DISABLED,
+    "OPEN": ElevatorMode.UPDATING | ElevatorMode.DISABLED,
+    "CLOSE": ElevatorMode.DISABLED,
+    "IN": ElevatorMode.SCHE_STOPPING,
+    "RECEIVE": ElevatorMode.SCHE_MOVING | ElevatorMode.SCHE_STOPPING | ElevatorMode.UPDATING | ElevatorMode.DISABLED,
+}
 
 # --- Data Structures ---
 class Passenger:
+    __slots__ = ("id", "priority", "from_floor_name", "to_floor_name", "from_floor_idx", "to_floor_idx",
+                 "request_time", "status", "current_floor_idx", "elevator_id", "last_receive_time",
+                 "completion_time")
+
     def __init__(self, id: int, priority: int, from_floor: str, to_floor: str, request_time: float):
         self.id = id
         self.priority = priority
@@ -63,11 +82,19 @@ class Passenger:
                 f"elevator={self.elevator_id})")
 
 class Elevator:
+    __slots__ = ("id", "current_floor_idx", "door_open", "passengers", "speed", "mode",
+                 "last_action_time", "last_arrive_time", "last_open_time", "last_close_time",
+                 "sche_request_time", "sche_accept_time", "sche_target_floor_idx", "sche_temp_speed",
+                 "sche_begin_time", "sche_arrive_count_since_accept",
+                 "update_request_time", "update_accept_time", "update_partner_id", "update_target_floor_idx",
+                 "update_begin_time", "update_arrive_count_since_accept",
+                 "double_partner_id", "double_mode_role", "min_floor_idx", "max_floor_idx")
+
     def __init__(self, id: int):
         self.id = id
-        self.current_floor_idx = FLOOR_MAP["F1"]
+        self.current_floor_idx = INITIAL_FLOOR_IDX
         self.door_open = False
-        self.passengers: Set[int] = set() # Set of passenger IDs inside
+        self.passengers: List[int] = [] # IDs of passengers inside, at most CAPACITY so a list beats a set
         self.speed = DEFAULT_SPEED
         self.mode = ElevatorMode.NORMAL
         self.last_action_time = 0.0 # Time of the last output action for this elevator
@@ -94,8 +121,9 @@ class Elevator:
         # Double Carriage specific state
         self.double_partner_id: Optional[int] = None # The other carriage in the same shaft
         self.double_mode_role: Optional[str] = None # 'A' (upper) or 'B' (lower)
-        self.double_min_floor_idx: int = 0
-        self.double_max_floor_idx: int = NUM_FLOORS - 1
+        # Valid floor range, narrowed when the elevator becomes a double carriage
+        self.min_floor_idx: int = 0
+        self.max_floor_idx: int = NUM_FLOORS - 1
 
     def get_floor_name(self) -> str:
         return FLOOR_NAMES.get(self.current_floor_idx, "Invalid")
@@ -106,15 +134,23 @@ class Elevator:
         return False # Simplified for now, rely on state transitions
 
     def can_move(self) -> bool:
-        return not self.door_open and self.mode not in [ElevatorMode.UPDATING, ElevatorMode.DISABLED]
-
-    def get_valid_floor_range(self) -> Tuple[int, int]:
-        if self.mode in [ElevatorMode.DOUBLE_A, ElevatorMode.DOUBLE_B]:
-            return self.double_min_floor_idx, self.double_max_floor_idx
-        elif self.mode == ElevatorMode.DISABLED:
-            return -1, -1 # Invalid range
-        else:
-            return 0, NUM_FLOORS - 1
+        return not self.door_open and not (self.mode & NO_MOVE_MODES)
+
+    def become_carriage(self, mode: ElevatorMode, role: str, partner_id: int, floor_idx: int,
+                        min_floor_idx: int, max_floor_idx: int):
+        """Resets this elevator as one carriage of a double-carriage shaft (UPDATE-END)."""
+        self.mode = mode
+        self.double_mode_role = role
+        self.double_partner_id = partner_id
+        self.current_floor_idx = floor_idx
+        self.min_floor_idx = min_floor_idx
+        self.max_floor_idx = max_floor_idx
+        self.speed = 0.2
+        self.door_open = False # Ensure closed
+        self.passengers = [] # Ensure empty
+        # Reset SCHE/UPDATE specific fields just in case
+        self.sche_request_time = -1.0
+        self.update_request_time = -1.0
 
     def __repr__(self):
         return (f"Elevator(id={self.id}, floor={self.get_floor_name()}, "
@@ -124,12 +160,18 @@ class Elevator:
 
 
 class SystemState:
+    __slots__ = ("elevators", "passengers", "active_receives", "receives_by_elevator", "input_commands",
+                 "completed_passengers", "last_timestamp", "max_time")
+
     def __init__(self):
         self.elevators: Dict[int, Elevator] = {i: Elevator(i) for i in ELEVATOR_IDS}
         self.passengers: Dict[int, Passenger] = {}
-        # passenger_id -> (elevator_id, receive_time)
-        self.active_receives: Dict[int, Tuple[int, float]] = {}
+        # passenger_id -> elevator_id; the receive time is kept in Passenger.last_receive_time
+        self.active_receives: Dict[int, int] = {}
+        # elevator_id -> passenger ids with an active receive by it (inverse of active_receives)
+        self.receives_by_elevator: Dict[int, Set[int]] = defaultdict(set)
         self.input_commands: List[Tuple[float, str, Dict[str, Any]]] = [] # (time, type, details)
+        self.completed_passengers = 0 # Passengers that reached COMPLETED (terminal, counted once)
         self.last_timestamp = 0.0
         self.max_time = 220.0 # Default to mutual test limit, adjust if needed
 
@@ -179,11 +221,13 @@ class SystemState:
 def fail(message: str, timestamp: Optional[float] = None, line: Optional[str] = None):
     """Prints an error message and exits."""
     prefix = f"[{timestamp:.1f}] " if timestamp is not None else ""
-    line_info = f"\n   Output Line: {line.strip()}" if line else ""
+    line_info = f"\n   Output Line: {line}" if line else "" # Callers pass the already stripped line
     print(f"Validation Error: {prefix}{message}{line_info}", file=sys.stderr)
     sys.exit(1)
 
 # --- Parsing Functions ---
+# Ordered by how often each action shows up in an output file (ARRIVE/OPEN/CLOSE dominate).
+# Lines are dispatched by keyword, never by scanning this dict, so the order is informational.
 OUTPUT_PATTERNS = {
     "ARRIVE": re.compile(r"\[\s*(\d+\.\d+)\s*\]ARRIVE-([A-Z0-9]+)-(\d+)$"),
     "OPEN": re.compile(r"\[\s*(\d+\.\d+)\s*\]OPEN-([A-Z0-9]+)-(\d+)$"),
@@ -205,60 +249,260 @@ INPUT_PATTERNS = {
     "UPDATE": re.compile(r"\[(\d+\.\d+)\]UPDATE-(\d+)-(\d+)-([A-Z0-9]+)$"),
 }
 
+class LineDispatcher:
+    """Picks the single candidate pattern for a line from the command keyword.
+
+    Patterns must share a "[timestamp]" prefix; the body that follows is matched
+    on its own, starting right after the ']'. The keyword in front of the first
+    group decides which body to try: keywords are keyed by their shortest prefix
+    that is unique among keywords with the same first character. A pattern with
+    no keyword (a body starting with a group) is tried when nothing else fits.
+    """
+    def __init__(self, patterns: Dict[str, "re.Pattern"], prefix: str):
+        assert prefix.startswith(r"\[") and prefix.endswith(r"\]")
+        self.timestamp_re = re.compile(prefix[2:-2])
+        self.default: Optional[Tuple[str, "re.Pattern"]] = None
+        keywords: Dict[str, Tuple[str, "re.Pattern"]] = {}
+        for name, pattern in patterns.items():
+            assert pattern.pattern.startswith(prefix)
+            body = pattern.pattern[len(prefix):]
+            keyword = body[:body.index("(")]
+            if keyword:
+                keywords[keyword] = (name, re.compile(body))
+            else:
+                self.default = (name, re.compile(body))
+        by_first = defaultdict(list)
+        for keyword in keywords:
+            by_first[keyword[0]].append(keyword)
+        self.prefix_len: Dict[str, int] = {}
+        for first, group in by_first.items():
+            n = 1
+            while len({k[:n] for k in group}) < len(group):
+                n += 1
+            self.prefix_len[first] = n
+        self.table = {k[:self.prefix_len[k[0]]]: entry for k, entry in keywords.items()}
+
+    def match(self, line: str) -> Optional[Tuple[str, str, "re.Match"]]:
+        """Returns (command type, timestamp string, body match) or None."""
+        if not line.startswith("["):
+            return None
+        pos = line.find("]")
+        if pos < 0:
+            return None
+        ts_match = self.timestamp_re.fullmatch(line, 1, pos)
+        if not ts_match:
+            return None
+        start = pos + 1
+        n = self.prefix_len.get(line[start:start + 1])
+        entry = self.table.get(line[start:start + n]) if n else None
+        if entry is None:
+            entry = self.default
+            if entry is None:
+                return None
+        name, body_re = entry
+        match = body_re.match(line, start)
+        if not match:
+            return None
+        return name, ts_match.group(1), match
+
+OUTPUT_DISPATCH = LineDispatcher(OUTPUT_PATTERNS, r"\[\s*(\d+\.\d+)\s*\]")
+INPUT_DISPATCH = LineDispatcher(INPUT_PATTERNS, r"\[(\d+\.\d+)\]")
+
+# Fast path: well-formed lines are taken apart with plain str operations. Anything
+# unusual (odd whitespace, non-ASCII digits, unknown floors or IDs, ...) returns None
+# and goes through the regex path, which stays the reference for what is accepted
+# and for every error message.
+ELEVATOR_ID_STRS = {str(i): i for i in ELEVATOR_IDS}
+
+def split_timestamp(line: str, allow_spaces: bool) -> Optional[Tuple[float, str]]:
+    """Splits '[<digits>.<digits>]rest' into (timestamp, rest)."""
+    if not line.startswith("["):
+        return None
+    pos = line.find("]")
+    if pos < 0:
+        return None
+    ts_str = line[1:pos]
+    if allow_spaces:
+        ts_str = ts_str.strip(" ")
+    head, dot, tail = ts_str.partition(".")
+    if not (dot and ts_str.isascii() and head.isdigit() and tail.isdigit()):
+        return None
+    return float(ts_str), line[pos + 1:]
+
+def ascii_int(text: str) -> Optional[int]:
+    return int(text) if text.isascii() and text.isdigit() else None
+
+def fast_floor_elevator(args: List[str]) -> Optional[Dict[str, Any]]:
+    floor_name, e_id = args
+    e_id = ELEVATOR_ID_STRS.get(e_id)
+    floor_idx = FLOOR_MAP.get(floor_name)
+    if e_id and floor_idx is not None:
+        return {"floor_name": floor_name, "floor_idx": floor_idx, "elevator_id": e_id}
+    return None
+
+def fast_in(args: List[str]) -> Optional[Dict[str, Any]]:
+    p_id, floor_name, e_id = args
+    p_id = ascii_int(p_id)
+    e_id = ELEVATOR_ID_STRS.get(e_id)
+    floor_idx = FLOOR_MAP.get(floor_name)
+    if p_id is not None and e_id and floor_idx is not None:
+        return {"passenger_id": p_id, "floor_name": floor_name, "floor_idx": floor_idx, "elevator_id": e_id}
+    return None
+
+def fast_out(args: List[str]) -> Optional[Dict[str, Any]]:
+    out_type, p_id, floor_name, e_id = args
+    p_id = ascii_int(p_id)
+    e_id = ELEVATOR_ID_STRS.get(e_id)
+    floor_idx = FLOOR_MAP.get(floor_name)
+    if out_type in ("S", "F") and p_id is not None and e_id and floor_idx is not None:
+        return {"type": out_type, "passenger_id": p_id, "floor_name": floor_name, "floor_idx": floor_idx,
+                "elevator_id": e_id}
+    return None
+
+def fast_receive(args: List[str]) -> Optional[Dict[str, Any]]:
+    p_id, e_id = args
+    p_id = ascii_int(p_id)
+    e_id = ELEVATOR_ID_STRS.get(e_id)
+    if p_id is not None and e_id:
+        return {"passenger_id": p_id, "elevator_id": e_id}
+    return None
+
+def fast_sche_accept(args: List[str]) -> Optional[Dict[str, Any]]:
+    e_id, speed, target_floor = args
+    e_id = ELEVATOR_ID_STRS.get(e_id)
+    head, dot, tail = speed.partition(".")
+    target_idx = FLOOR_MAP.get(target_floor)
+    if e_id and dot and speed.isascii() and head.isdigit() and tail.isdigit() and target_idx is not None:
+        return {"elevator_id": e_id, "speed": float(speed), "target_floor": target_floor, "target_floor_idx": target_idx}
+    return None
+
+def fast_elevator(args: List[str]) -> Optional[Dict[str, Any]]:
+    e_id = ELEVATOR_ID_STRS.get(args[0])
+    return {"elevator_id": e_id} if e_id else None
+
+def fast_update_accept(args: List[str]) -> Optional[Dict[str, Any]]:
+    a_id, b_id, target_floor = args
+    a_id = ELEVATOR_ID_STRS.get(a_id)
+    b_id = ELEVATOR_ID_STRS.get(b_id)
+    target_idx = FLOOR_MAP.get(target_floor)
+    if a_id and b_id and target_idx is not None:
+        return {"elevator_a_id": a_id, "elevator_b_id": b_id, "target_floor": target_floor, "target_floor_idx": target_idx}
+    return None
+
+def fast_elevator_pair(args: List[str]) -> Optional[Dict[str, Any]]:
+    a_id = ELEVATOR_ID_STRS.get(args[0])
+    b_id = ELEVATOR_ID_STRS.get(args[1])
+    return {"elevator_a_id": a_id, "elevator_b_id": b_id} if a_id and b_id else None
+
+# action type -> (number of '-' separated fields after the keyword, parser)
+FAST_OUTPUT_PARSERS = {
+    "ARRIVE": (2, fast_floor_elevator),
+    "OPEN": (2, fast_floor_elevator),
+    "CLOSE": (2, fast_floor_elevator),
+    "IN": (3, fast_in),
+    "OUT": (4, fast_out),
+    "RECEIVE": (2, fast_receive),
+    "SCHE-ACCEPT": (3, fast_sche_accept),
+    "SCHE-BEGIN": (1, fast_elevator),
+    "SCHE-END": (1, fast_elevator),
+    "UPDATE-ACCEPT": (3, fast_update_accept),
+    "UPDATE-BEGIN": (2, fast_elevator_pair),
+    "UPDATE-END": (2, fast_elevator_pair),
+}
+
+def parse_output_fast(line: str) -> Optional[Tuple[float, str, Dict[str, Any]]]:
+    split = split_timestamp(line, allow_spaces=True)
+    if not split:
+        return None
+    timestamp, payload = split
+    parts = payload.split("-")
+    if parts[0] in ("SCHE", "UPDATE") and len(parts) > 1:
+        action_type, args = f"{parts[0]}-{parts[1]}", parts[2:]
+    else:
+        action_type, args = parts[0], parts[1:]
+    entry = FAST_OUTPUT_PARSERS.get(action_type)
+    if not entry or len(args) != entry[0]:
+        return None
+    details = entry[1](args)
+    return (timestamp, action_type, details) if details else None
+
+def parse_input_fast(line: str) -> Optional[Tuple[str, float, Tuple[str, ...]]]:
+    """Returns (command type, timestamp, params) with params as the regex would capture them."""
+    split = split_timestamp(line, allow_spaces=False)
+    if not split:
+        return None
+    timestamp, payload = split
+    parts = payload.split("-")
+    if len(parts) == 7 and parts[1] == "PRI" and parts[3] == "FROM" and parts[5] == "TO":
+        params = (parts[0], parts[2], parts[4], parts[6])
+        if (ascii_int(params[0]) is not None and ascii_int(params[1]) is not None
+                and params[2] in FLOOR_MAP and params[3] in FLOOR_MAP):
+            return "PASSENGER", timestamp, params
+    elif len(parts) == 4 and parts[0] == "SCHE":
+        head, dot, tail = parts[2].partition(".")
+        if (ascii_int(parts[1]) is not None and dot and parts[2].isascii() and head.isdigit()
+                and tail.isdigit() and parts[3] in FLOOR_MAP):
+            return "SCHE", timestamp, tuple(parts[1:])
+    elif len(parts) == 4 and parts[0] == "UPDATE":
+        if ascii_int(parts[1]) is not None and ascii_int(parts[2]) is not None and parts[3] in FLOOR_MAP:
+            return "UPDATE", timestamp, tuple(parts[1:])
+    return None
+
+# Action type -> builder turning the regex groups into the details dict
+OUTPUT_DETAIL_BUILDERS = {
+    "ARRIVE": lambda params: {"floor_name": params[0], "elevator_id": int(params[1])},
+    "OPEN": lambda params: {"floor_name": params[0], "elevator_id": int(params[1])},
+    "CLOSE": lambda params: {"floor_name": params[0], "elevator_id": int(params[1])},
+    "IN": lambda params: {"passenger_id": int(params[0]), "floor_name": params[1], "elevator_id": int(params[2])},
+    "OUT": lambda params: {"type": params[0], "passenger_id": int(params[1]), "floor_name": params[2], "elevator_id": int(params[3])},
+    "RECEIVE": lambda params: {"passenger_id": int(params[0]), "elevator_id": int(params[1])},
+    "SCHE-ACCEPT": lambda params: {"elevator_id": int(params[0]), "speed": float(params[1]), "target_floor": params[2]},
+    "SCHE-BEGIN": lambda params: {"elevator_id": int(params[0])},
+    "SCHE-END": lambda params: {"elevator_id": int(params[0])},
+    "UPDATE-ACCEPT": lambda params: {"elevator_a_id": int(params[0]), "elevator_b_id": int(params[1]), "target_floor": params[2]},
+    "UPDATE-BEGIN": lambda params: {"elevator_a_id": int(params[0]), "elevator_b_id": int(params[1])},
+    "UPDATE-END": lambda params: {"elevator_a_id": int(params[0]), "elevator_b_id": int(params[1])},
+}
 
 def parse_output_line(line: str) -> Optional[Tuple[float, str, Dict[str, Any]]]:
-    """Parses a line from the output file."""
-    for action_type, pattern in OUTPUT_PATTERNS.items():
-        match = pattern.match(line.strip())
-        if match:
-            timestamp = float(match.group(1))
-            params = match.groups()[1:]
-            details: Dict[str, Any] = {}
-            try:
-                if action_type == "ARRIVE":
-                    details = {"floor_name": params[0], "elevator_id": int(params[1])}
-                elif action_type == "OPEN":
-                    details = {"floor_name": params[0], "elevator_id": int(params[1])}
-                elif action_type == "CLOSE":
-                    details = {"floor_name": params[0], "elevator_id": int(params[1])}
-                elif action_type == "IN":
-                    details = {"passenger_id": int(params[0]), "floor_name": params[1], "elevator_id": int(params[2])}
-                elif action_type == "OUT":
-                    details = {"type": params[0], "passenger_id": int(params[1]), "floor_name": params[2], "elevator_id": int(params[3])}
-                elif action_type == "RECEIVE":
-                    details = {"passenger_id": int(params[0]), "elevator_id": int(params[1])}
-                elif action_type == "SCHE-ACCEPT":
-                     details = {"elevator_id": int(params[0]), "speed": float(params[1]), "target_floor": params[2]}
-                elif action_type == "SCHE-BEGIN":
-                    details = {"elevator_id": int(params[0])}
-                elif action_type == "SCHE-END":
-                    details = {"elevator_id": int(params[0])}
-                elif action_type == "UPDATE-ACCEPT":
-                     details = {"elevator_a_id": int(params[0]), "elevator_b_id": int(params[1]), "target_floor": params[2]}
-                elif action_type == "UPDATE-BEGIN":
-                    details = {"elevator_a_id": int(params[0]), "elevator_b_id": int(params[1])}
-                elif action_type == "UPDATE-END":
-                    details = {"elevator_a_id": int(params[0]), "elevator_b_id": int(params[1])}
-                else:
-                    # Should not happen if patterns are correct
-                    return None
-            except (ValueError, IndexError):
-                 fail(f"Invalid parameters in {action_type} line", timestamp, line)
-
-            # Validate common parameters
-            if "elevator_id" in details and details["elevator_id"] not in ELEVATOR_IDS:
-                 fail(f"Invalid elevator ID {details['elevator_id']} in {action_type}", timestamp, line)
-            if "elevator_a_id" in details and details["elevator_a_id"] not in ELEVATOR_IDS:
-                 fail(f"Invalid elevator ID {details['elevator_a_id']} in {action_type}", timestamp, line)
-            if "elevator_b_id" in details and details["elevator_b_id"] not in ELEVATOR_IDS:
-                 fail(f"Invalid elevator ID {details['elevator_b_id']} in {action_type}", timestamp, line)
-            if "floor_name" in details and details["floor_name"] not in FLOOR_MAP:
-                 fail(f"Invalid floor name '{details['floor_name']}' in {action_type}", timestamp, line)
-            if "target_floor" in details and details["target_floor"] not in FLOOR_MAP:
-                 fail(f"Invalid target floor name '{details['target_floor']}' in {action_type}", timestamp, line)
-
-            return timestamp, action_type, details
-    return None # Line didn't match any known pattern
+    """Parses a line from the output file. Expects the line already stripped by the caller."""
+    parsed = parse_output_fast(line)
+    if parsed:
+        return parsed
+
+    matched = OUTPUT_DISPATCH.match(line)
+    if not matched:
+        return None # Line didn't match any known pattern
+
+    action_type, ts_str, match = matched
+    timestamp = float(ts_str)
+    params = match.groups()
+    builder = OUTPUT_DETAIL_BUILDERS.get(action_type)
+    if not builder:
+        # Should not happen if patterns are correct
+        return None
+    try:
+        details = builder(params)
+    except (ValueError, IndexError):
+         fail(f"Invalid parameters in {action_type} line", timestamp, line)
+
+    # Validate common parameters
+    if "elevator_id" in details and details["elevator_id"] not in ELEVATOR_IDS:
+         fail(f"Invalid elevator ID {details['elevator_id']} in {action_type}", timestamp, line)
+    if "elevator_a_id" in details and details["elevator_a_id"] not in ELEVATOR_IDS:
+         fail(f"Invalid elevator ID {details['elevator_a_id']} in {action_type}", timestamp, line)
+    if "elevator_b_id" in details and details["elevator_b_id"] not in ELEVATOR_IDS:
+         fail(f"Invalid elevator ID {details['elevator_b_id']} in {action_type}", timestamp, line)
+    if "floor_name" in details:
+        if details["floor_name"] not in FLOOR_MAP:
+            fail(f"Invalid floor name '{details['floor_name']}' in {action_type}", timestamp, line)
+        details["floor_idx"] = FLOOR_MAP[details["floor_name"]] # Resolved once here for the check_* handlers
+    if "target_floor" in details:
+        if details["target_floor"] not in FLOOR_MAP:
+            fail(f"Invalid target floor name '{details['target_floor']}' in {action_type}", timestamp, line)
+        details["target_floor_idx"] = FLOOR_MAP[details["target_floor"]]
+
+    return timestamp, action_type, details
 
 def parse_input_file(filepath: str, state: SystemState):
     """Parses the input file to populate initial requests."""
@@ -269,43 +513,42 @@ def parse_input_file(filepath: str, state: SystemState):
                 if not line:
                     continue
 
-                matched = False
-                for cmd_type, pattern in INPUT_PATTERNS.items():
-                    match = pattern.match(line)
-                    if match:
-                        timestamp = float(match.group(1))
-                        params = match.groups()[1:]
-                        try:
-                            if cmd_type == "PASSENGER":
-                                p_id, prio, from_f, to_f = params
-                                if from_f == to_f:
-                                     fail(f"Input Error (Line {line_num}): Passenger {p_id} FROM and TO floors are the same ('{from_f}')")
-                                if from_f not in FLOOR_MAP or to_f not in FLOOR_MAP:
-                                     fail(f"Input Error (Line {line_num}): Invalid floor name for passenger {p_id} ('{from_f}' or '{to_f}')")
-                                state.add_passenger_request(int(p_id), int(prio), from_f, to_f, timestamp)
-                            elif cmd_type == "SCHE":
-                                e_id, speed, target_f = params
-                                if int(e_id) not in ELEVATOR_IDS:
-                                     fail(f"Input Error (Line {line_num}): Invalid elevator ID {e_id} for SCHE")
-                                if target_f not in FLOOR_MAP:
-                                     fail(f"Input Error (Line {line_num}): Invalid target floor '{target_f}' for SCHE")
-                                state.add_sche_request(int(e_id), float(speed), target_f, timestamp)
-                            elif cmd_type == "UPDATE":
-                                a_id, b_id, target_f = params
-                                if int(a_id) not in ELEVATOR_IDS or int(b_id) not in ELEVATOR_IDS:
-                                     fail(f"Input Error (Line {line_num}): Invalid elevator ID {a_id} or {b_id} for UPDATE")
-                                if a_id == b_id:
-                                     fail(f"Input Error (Line {line_num}): UPDATE involves same elevator ID {a_id}")
-                                if target_f not in FLOOR_MAP:
-                                     fail(f"Input Error (Line {line_num}): Invalid target floor '{target_f}' for UPDATE")
-                                state.add_update_request(int(a_id), int(b_id), target_f, timestamp)
-                            matched = True
-                            break # Stop checking patterns for this line
-                        except (ValueError, IndexError) as e:
-                             fail(f"Input Error (Line {line_num}): Invalid format or value - {e}\n   Line: {line}")
-
-                if not matched:
-                    fail(f"Input Error (Line {line_num}): Unknown command format\n   Line: {line}")
+                parsed = parse_input_fast(line)
+                if parsed:
+                    cmd_type, timestamp, params = parsed
+                else:
+                    matched = INPUT_DISPATCH.match(line)
+                    if not matched:
+                        fail(f"Input Error (Line {line_num}): Unknown command format\n   Line: {line}")
+                    cmd_type, ts_str, match = matched
+                    timestamp = float(ts_str)
+                    params = match.groups()
+                try:
+                    if cmd_type == "PASSENGER":
+                        p_id, prio, from_f, to_f = params
+                        if from_f == to_f:
+                             fail(f"Input Error (Line {line_num}): Passenger {p_id} FROM and TO floors are the same ('{from_f}')")
+                        if from_f not in FLOOR_MAP or to_f not in FLOOR_MAP:
+                             fail(f"Input Error (Line {line_num}): Invalid floor name for passenger {p_id} ('{from_f}' or '{to_f}')")
+                        state.add_passenger_request(int(p_id), int(prio), from_f, to_f, timestamp)
+                    elif cmd_type == "SCHE":
+                        e_id, speed, target_f = params
+                        if int(e_id) not in ELEVATOR_IDS:
+                             fail(f"Input Error (Line {line_num}): Invalid elevator ID {e_id} for SCHE")
+                        if target_f not in FLOOR_MAP:
+                             fail(f"Input Error (Line {line_num}): Invalid target floor '{target_f}' for SCHE")
+                        state.add_sche_request(int(e_id), float(speed), target_f, timestamp)
+                    elif cmd_type == "UPDATE":
+                        a_id, b_id, target_f = params
+                        if int(a_id) not in ELEVATOR_IDS or int(b_id) not in ELEVATOR_IDS:
+                             fail(f"Input Error (Line {line_num}): Invalid elevator ID {a_id} or {b_id} for UPDATE")
+                        if a_id == b_id:
+                             fail(f"Input Error (Line {line_num}): UPDATE involves same elevator ID {a_id}")
+                        if target_f not in FLOOR_MAP:
+                             fail(f"Input Error (Line {line_num}): Invalid target floor '{target_f}' for UPDATE")
+                        state.add_update_request(int(a_id), int(b_id), target_f, timestamp)
+                except (ValueError, IndexError) as e:
+                     fail(f"Input Error (Line {line_num}): Invalid format or value - {e}\n   Line: {line}")
 
     except FileNotFoundError:
         fail(f"Input file not found: {filepath}")
@@ -315,34 +558,27 @@ def parse_input_file(filepath: str, state: SystemState):
 
 # --- Validation Logic ---
 
-def check_timestamp(timestamp: float, state: SystemState, line: str):
-    if timestamp < state.last_timestamp - TIME_PRECISION:
-        fail(f"Timestamp out of order. Current: {timestamp:.1f}, Previous: {state.last_timestamp:.1f}", timestamp, line)
-    if timestamp > state.max_time + TIME_PRECISION:
-         fail(f"Total run time {timestamp:.1f} exceeds limit {state.max_time:.1f}", timestamp, line)
-    state.last_timestamp = timestamp
-
 def check_arrive(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     e_id = details["elevator_id"]
     floor_name = details["floor_name"]
-    floor_idx = FLOOR_MAP[floor_name]
-    elevator = state.get_elevator(e_id)
+    floor_idx = details["floor_idx"]
+    elevator = state.elevators.get(e_id)
 
     if not elevator: fail(f"ARRIVE: Elevator {e_id} does not exist?", timestamp, line) # Should be caught earlier
 
     # Basic state checks
     if elevator.door_open:
         fail(f"ARRIVE: Elevator {e_id} arrived at {floor_name} with door open", timestamp, line)
-    if elevator.mode == ElevatorMode.UPDATING:
-         fail(f"ARRIVE: Elevator {e_id} moved during UPDATE", timestamp, line)
-    if elevator.mode == ElevatorMode.DISABLED:
-         fail(f"ARRIVE: Elevator {e_id} (shaft A) moved after being disabled by UPDATE", timestamp, line)
+    if elevator.mode & ACTION_FORBIDDEN_MODES["ARRIVE"]:
+        if elevator.mode == ElevatorMode.UPDATING:
+             fail(f"ARRIVE: Elevator {e_id} moved during UPDATE", timestamp, line)
+        fail(f"ARRIVE: Elevator {e_id} (shaft A) moved after being disabled by UPDATE", timestamp, line)
 
 
     # Floor range check
-    min_f, max_f = elevator.get_valid_floor_range()
-    if not (min_f <= floor_idx <= max_f):
-         fail(f"ARRIVE: Elevator {e_id} moved outside its valid range ({FLOOR_NAMES[min_f]}-{FLOOR_NAMES[max_f]}) to {floor_name}", timestamp, line)
+    # (DISABLED shafts were rejected above, other modes keep the range set at UPDATE-END)
+    if not (elevator.min_floor_idx <= floor_idx <= elevator.max_floor_idx):
+         fail(f"ARRIVE: Elevator {e_id} moved outside its valid range ({FLOOR_NAMES[elevator.min_floor_idx]}-{FLOOR_NAMES[elevator.max_floor_idx]}) to {floor_name}", timestamp, line)
 
     # Movement check (must move one floor at a time)
     floor_diff = abs(floor_idx - elevator.current_floor_idx)
@@ -359,8 +595,8 @@ def check_arrive(timestamp: float, details: Dict[str, Any], state: SystemState,
              f"(Last action at {elevator.last_action_time:.1f})", timestamp, line)
 
     # Double carriage collision check
-    if elevator.mode in [ElevatorMode.DOUBLE_A, ElevatorMode.DOUBLE_B]:
-        partner = state.get_elevator(elevator.double_partner_id)
+    if elevator.mode & DOUBLE_MODES:
+        partner = state.elevators.get(elevator.double_partner_id)
         if not partner: fail(f"ARRIVE: Double carriage partner {elevator.double_partner_id} not found for {e_id}", timestamp, line)
         if floor_idx == partner.current_floor_idx:
              fail(f"ARRIVE: Double carriages {e_id} and {partner.id} collided at floor {floor_name}", timestamp, line)
@@ -390,8 +626,8 @@ def check_arrive(timestamp: float, details: Dict[str, Any], state: SystemState,
 def check_open(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     e_id = details["elevator_id"]
     floor_name = details["floor_name"]
-    floor_idx = FLOOR_MAP[floor_name]
-    elevator = state.get_elevator(e_id)
+    floor_idx = details["floor_idx"]
+    elevator = state.elevators.get(e_id)
 
     if not elevator: fail(f"OPEN: Elevator {e_id} does not exist?", timestamp, line)
 
@@ -401,14 +637,14 @@ def check_open(timestamp: float, details: Dict[str, Any], state: SystemState, li
         fail(f"OPEN: Elevator {e_id} tried to open door at {floor_name} when already open", timestamp, line)
     if elevator.mode == ElevatorMode.SCHE_MOVING and elevator.current_floor_idx != elevator.sche_target_floor_idx:
          fail(f"OPEN: Elevator {e_id} opened door during SCHE movement", timestamp, line)
-    if elevator.mode == ElevatorMode.UPDATING:
-         fail(f"OPEN: Elevator {e_id} opened door during UPDATE", timestamp, line)
-    if elevator.mode == ElevatorMode.DISABLED:
-         fail(f"OPEN: Elevator {e_id} (shaft A) opened door after being disabled", timestamp, line)
+    if elevator.mode & ACTION_FORBIDDEN_MODES["OPEN"]:
+        if elevator.mode == ElevatorMode.UPDATING:
+             fail(f"OPEN: Elevator {e_id} opened door during UPDATE", timestamp, line)
+        fail(f"OPEN: Elevator {e_id} (shaft A) opened door after being disabled", timestamp, line)
 
     # Time check: Must happen after ARRIVE at this floor (or initially at F1)
     # Allow OPEN immediately after ARRIVE at the same timestamp
-    if timestamp < elevator.last_arrive_time - TIME_PRECISION and not (elevator.current_floor_idx == FLOOR_MAP["F1"] and timestamp < TIME_PRECISION):
+    if timestamp < elevator.last_arrive_time - TIME_PRECISION and not (elevator.current_floor_idx == INITIAL_FLOOR_IDX and timestamp < TIME_PRECISION):
          fail(f"OPEN: Elevator {e_id} opened at {floor_name} ({timestamp:.1f}) before arriving ({elevator.last_arrive_time:.1f})", timestamp, line)
 
 
@@ -425,8 +661,8 @@ def check_open(timestamp: float, details: Dict[str, Any], state: SystemState, li
 def check_close(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     e_id = details["elevator_id"]
     floor_name = details["floor_name"]
-    floor_idx = FLOOR_MAP[floor_name]
-    elevator = state.get_elevator(e_id)
+    floor_idx = details["floor_idx"]
+    elevator = state.elevators.get(e_id)
 
     if not elevator: fail(f"CLOSE: Elevator {e_id} does not exist?", timestamp, line)
 
@@ -434,7 +670,7 @@ def check_close(timestamp: float, details: Dict[str, Any], state: SystemState, l
         fail(f"CLOSE: Elevator {e_id} closed at {floor_name} but is currently at {elevator.get_floor_name()}", timestamp, line)
     if not elevator.door_open:
         fail(f"CLOSE: Elevator {e_id} tried to close door at {floor_name} when already closed", timestamp, line)
-    if elevator.mode == ElevatorMode.DISABLED:
+    if elevator.mode & ACTION_FORBIDDEN_MODES["CLOSE"]:
          fail(f"CLOSE: Elevator {e_id} (shaft A) closed door after being disabled", timestamp, line)
 
 
@@ -454,9 +690,9 @@ def check_in(timestamp: float, details: Dict[str, Any], state: SystemState, line
     p_id = details["passenger_id"]
     floor_name = details["floor_name"]
     e_id = details["elevator_id"]
-    floor_idx = FLOOR_MAP[floor_name]
-    elevator = state.get_elevator(e_id)
-    passenger = state.get_passenger(p_id)
+    floor_idx = details["floor_idx"]
+    elevator = state.elevators.get(e_id)
+    passenger = state.passengers.get(p_id)
 
     if not elevator: fail(f"IN: Elevator {e_id} does not exist?", timestamp, line)
     if not passenger: fail(f"IN: Passenger {p_id} does not exist (not in input?)", timestamp, line)
@@ -475,23 +711,22 @@ def check_in(timestamp: float, details: Dict[str, Any], state: SystemState, line
          fail(f"IN: Passenger {p_id} tried to enter elevator {e_id}, but was received by {passenger.elevator_id}", timestamp, line)
 
     # Check RECEIVE constraint (must have active receive for this passenger/elevator)
-    active_receive = state.active_receives.get(p_id)
-    if not active_receive or active_receive[0] != e_id:
+    if state.active_receives.get(p_id) != e_id:
          fail(f"IN: Passenger {p_id} entered elevator {e_id} without a valid preceding RECEIVE", timestamp, line)
     # Check timing: IN must happen at or after RECEIVE
-    receive_time = active_receive[1]
+    receive_time = passenger.last_receive_time
     if timestamp < receive_time - TIME_PRECISION:
          fail(f"IN: Passenger {p_id} entered elevator {e_id} at {timestamp:.1f} before being received at {receive_time:.1f}", timestamp, line)
 
     # SCHE constraint: No IN during SCHE stop phase
-    if elevator.mode == ElevatorMode.SCHE_STOPPING:
+    if elevator.mode & ACTION_FORBIDDEN_MODES["IN"]:
          fail(f"IN: Passenger {p_id} entered elevator {e_id} during SCHE stop phase at {floor_name}", timestamp, line)
 
 
     # Update state
     passenger.status = PassengerStatus.INSIDE
     # passenger.current_floor_idx remains the elevator's floor
-    elevator.passengers.add(p_id)
+    elevator.passengers.append(p_id)
     # Note: IN/OUT are instantaneous, don't update elevator.last_action_time
 
 def check_out(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
@@ -499,9 +734,9 @@ def check_out(timestamp: float, details: Dict[str, Any], state: SystemState, lin
     p_id = details["passenger_id"]
     floor_name = details["floor_name"]
     e_id = details["elevator_id"]
-    floor_idx = FLOOR_MAP[floor_name]
-    elevator = state.get_elevator(e_id)
-    passenger = state.get_passenger(p_id)
+    floor_idx = details["floor_idx"]
+    elevator = state.elevators.get(e_id)
+    passenger = state.passengers.get(p_id)
 
     if not elevator: fail(f"OUT: Elevator {e_id} does not exist?", timestamp, line)
     if not passenger: fail(f"OUT: Passenger {p_id} does not exist?", timestamp, line)
@@ -528,6 +763,7 @@ def check_out(timestamp: float, details: Dict[str, Any], state: SystemState, lin
     if out_type == 'S':
         passenger.status = PassengerStatus.COMPLETED
         passenger.completion_time = timestamp
+        state.completed_passengers += 1
     else: # OUT-F
         # If exited during SCHE stop, treat as failed/needs reschedule
         if elevator.mode == ElevatorMode.SCHE_STOPPING:
@@ -537,27 +773,28 @@ def check_out(timestamp: float, details: Dict[str, Any], state: SystemState, lin
              passenger.status = PassengerStatus.OUTSIDE
 
     # Cancel the corresponding RECEIVE upon OUT
-    if p_id in state.active_receives and state.active_receives[p_id][0] == e_id:
+    if state.active_receives.get(p_id) == e_id:
          # Check if this OUT corresponds to the *most recent* receive for this pair
          # This requires tracking receive history or assuming only one active receive per passenger
          # Simplified: Assume it cancels the current one if it exists
          del state.active_receives[p_id]
+         state.receives_by_elevator[e_id].discard(p_id)
 
 
 def check_receive(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     p_id = details["passenger_id"]
     e_id = details["elevator_id"]
-    elevator = state.get_elevator(e_id)
-    passenger = state.get_passenger(p_id)
+    elevator = state.elevators.get(e_id)
+    passenger = state.passengers.get(p_id)
 
     if not elevator: fail(f"RECEIVE: Elevator {e_id} does not exist?", timestamp, line)
     if not passenger: fail(f"RECEIVE: Passenger {p_id} does not exist?", timestamp, line)
 
-    if passenger.status not in [PassengerStatus.OUTSIDE, PassengerStatus.FAILED_OUT]:
+    if not (passenger.status & RECEIVABLE_STATUSES):
          fail(f"RECEIVE: Passenger {p_id} received by elevator {e_id}, but status is {passenger.status.name} (must be OUTSIDE or FAILED_OUT)", timestamp, line)
     if p_id in state.active_receives:
-         fail(f"RECEIVE: Passenger {p_id} received by elevator {e_id}, but already has an active receive by elevator {state.active_receives[p_id][0]}", timestamp, line)
-    if elevator.mode in [ElevatorMode.SCHE_MOVING, ElevatorMode.SCHE_STOPPING, ElevatorMode.UPDATING, ElevatorMode.DISABLED]:
+         fail(f"RECEIVE: Passenger {p_id} received by elevator {e_id}, but already has an active receive by elevator {state.active_receives[p_id]}", timestamp, line)
+    if elevator.mode & ACTION_FORBIDDEN_MODES["RECEIVE"]:
          fail(f"RECEIVE: Elevator {e_id} issued RECEIVE for {p_id} while in mode {elevator.mode.name}", timestamp, line)
 
     # Check empty elevator movement constraint (can only move if has passengers or SCHE/UPDATE task, or after receiving someone)
@@ -566,7 +803,8 @@ def check_receive(timestamp: float, details: Dict[str, Any], state: SystemState,
     # A full check requires looking ahead or verifying upon ARRIVE.
 
     # Update state
-    state.active_receives[p_id] = (e_id, timestamp)
+    state.active_receives[p_id] = e_id
+    state.receives_by_elevator[e_id].add(p_id)
     passenger.status = PassengerStatus.WAITING
     passenger.elevator_id = e_id # Mark who they are waiting for
     passenger.last_receive_time = timestamp
@@ -576,8 +814,7 @@ def check_sche_accept(timestamp: float, details: Dict[str, Any], state: SystemSt
     # This is an official output, primarily used to trigger state changes in the judge
     e_id = details["elevator_id"]
     speed = details["speed"]
-    target_floor = details["target_floor"]
-    elevator = state.get_elevator(e_id)
+    elevator = state.elevators.get(e_id)
 
     if not elevator: fail(f"SCHE-ACCEPT: Elevator {e_id} does not exist?", timestamp, line)
 
@@ -595,14 +832,14 @@ def check_sche_accept(timestamp: float, details: Dict[str, Any], state: SystemSt
     elevator.mode = ElevatorMode.SCHE_PENDING
     elevator.sche_request_time = timestamp # Or find exact input time if needed
     elevator.sche_accept_time = timestamp
-    elevator.sche_target_floor_idx = FLOOR_MAP[target_floor]
+    elevator.sche_target_floor_idx = details["target_floor_idx"]
     elevator.sche_temp_speed = speed
     elevator.sche_arrive_count_since_accept = 0
     # elevator.last_action_time = timestamp # Official output acts as an action
 
 def check_sche_begin(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     e_id = details["elevator_id"]
-    elevator = state.get_elevator(e_id)
+    elevator = state.elevators.get(e_id)
 
     if not elevator: fail(f"SCHE-BEGIN: Elevator {e_id} does not exist?", timestamp, line)
 
@@ -626,9 +863,9 @@ def check_sche_begin(timestamp: float, details: Dict[str, Any], state: SystemSta
     # elevator.last_action_time = timestamp
 
     # Cancel active receives for this elevator
-    receives_to_cancel = [pid for pid, (eid, _) in state.active_receives.items() if eid == e_id]
+    receives_to_cancel = state.receives_by_elevator.pop(e_id, ())
     for pid in receives_to_cancel:
-        passenger = state.get_passenger(pid)
+        passenger = state.passengers.get(pid)
         if passenger and passenger.status == PassengerStatus.WAITING:
              passenger.status = PassengerStatus.OUTSIDE # Back to needing a ride
              passenger.elevator_id = None
@@ -638,7 +875,7 @@ def check_sche_begin(timestamp: float, details: Dict[str, Any], state: SystemSta
 
 def check_sche_end(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     e_id = details["elevator_id"]
-    elevator = state.get_elevator(e_id)
+    elevator = state.elevators.get(e_id)
 
     if not elevator: fail(f"SCHE-END: Elevator {e_id} does not exist?", timestamp, line)
 
@@ -680,9 +917,8 @@ def check_update_accept(timestamp: float, details: Dict[str, Any], state: System
     # Official output, trigger state changes
     a_id = details["elevator_a_id"]
     b_id = details["elevator_b_id"]
-    target_floor = details["target_floor"]
-    elevator_a = state.get_elevator(a_id)
-    elevator_b = state.get_elevator(b_id)
+    elevator_a = state.elevators.get(a_id)
+    elevator_b = state.elevators.get(b_id)
 
     if not elevator_a: fail(f"UPDATE-ACCEPT: Elevator A ({a_id}) does not exist?", timestamp, line)
     if not elevator_b: fail(f"UPDATE-ACCEPT: Elevator B ({b_id}) does not exist?", timestamp, line)
@@ -693,15 +929,14 @@ def check_update_accept(timestamp: float, details: Dict[str, Any], state: System
 
     if elevator_a.mode != ElevatorMode.NORMAL or elevator_b.mode != ElevatorMode.NORMAL:
          fail(f"UPDATE-ACCEPT: Elevators {a_id} ({elevator_a.mode.name}) or {b_id} ({elevator_b.mode.name}) not in NORMAL mode", timestamp, line)
-    if elevator_a.sche_request_time != -1 or elevator_b.sche_request_time != -1:
-         fail(f"UPDATE-ACCEPT: Elevators {a_id} or {b_id} received UPDATE after being involved in SCHE", timestamp, line)
+    # No separate SCHE guard: sche_request_time is only set outside NORMAL mode (SCHE-ACCEPT..SCHE-END)
     if elevator_a.update_partner_id is not None or elevator_b.update_partner_id is not None:
          fail(f"UPDATE-ACCEPT: Elevators {a_id} or {b_id} received UPDATE after already being involved in UPDATE", timestamp, line)
 
 
     # Update state
-    target_idx = FLOOR_MAP[target_floor]
-    for e in [elevator_a, elevator_b]:
+    target_idx = details["target_floor_idx"]
+    for e in (elevator_a, elevator_b):
         e.mode = ElevatorMode.UPDATE_PENDING
         e.update_request_time = timestamp # Or find exact input time
         e.update_accept_time = timestamp
@@ -713,8 +948,8 @@ def check_update_accept(timestamp: float, details: Dict[str, Any], state: System
 def check_update_begin(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     a_id = details["elevator_a_id"]
     b_id = details["elevator_b_id"]
-    elevator_a = state.get_elevator(a_id)
-    elevator_b = state.get_elevator(b_id)
+    elevator_a = state.elevators.get(a_id)
+    elevator_b = state.elevators.get(b_id)
 
     if not elevator_a: fail(f"UPDATE-BEGIN: Elevator A ({a_id}) does not exist?", timestamp, line)
     if not elevator_b: fail(f"UPDATE-BEGIN: Elevator B ({b_id}) does not exist?", timestamp, line)
@@ -735,15 +970,15 @@ def check_update_begin(timestamp: float, details: Dict[str, Any], state: SystemS
     # A full check would need to track passenger releases after UPDATE-ACCEPT.
 
     # Update state
-    for e in [elevator_a, elevator_b]:
+    for e in (elevator_a, elevator_b):
         e.mode = ElevatorMode.UPDATING
         e.update_begin_time = timestamp
         # e.last_action_time = timestamp
 
     # Cancel active receives for both elevators
-    receives_to_cancel = [pid for pid, (eid, _) in state.active_receives.items() if eid == a_id or eid == b_id]
+    receives_to_cancel = state.receives_by_elevator.pop(a_id, set()) | state.receives_by_elevator.pop(b_id, set())
     for pid in receives_to_cancel:
-        passenger = state.get_passenger(pid)
+        passenger = state.passengers.get(pid)
         if passenger and passenger.status == PassengerStatus.WAITING:
              passenger.status = PassengerStatus.OUTSIDE
              passenger.elevator_id = None
@@ -754,8 +989,8 @@ def check_update_begin(timestamp: float, details: Dict[str, Any], state: SystemS
 def check_update_end(timestamp: float, details: Dict[str, Any], state: SystemState, line: str):
     a_id = details["elevator_a_id"]
     b_id = details["elevator_b_id"]
-    elevator_a = state.get_elevator(a_id)
-    elevator_b = state.get_elevator(b_id)
+    elevator_a = state.elevators.get(a_id)
+    elevator_b = state.elevators.get(b_id)
 
     if not elevator_a: fail(f"UPDATE-END: Elevator A ({a_id}) does not exist?", timestamp, line)
     if not elevator_b: fail(f"UPDATE-END: Elevator B ({b_id}) does not exist?", timestamp, line)
@@ -790,35 +1025,13 @@ def check_update_end(timestamp: float, details: Dict[str, Any], state: SystemSta
     # Carriage A (original elevator A)
     elevator_a_carriage = elevator_a # Re-purpose A's object for its carriage state
     elevator_a_carriage.id = a_id # Keep original ID for reference
-    elevator_a_carriage.mode = ElevatorMode.DOUBLE_A
-    elevator_a_carriage.double_mode_role = 'A'
-    elevator_a_carriage.double_partner_id = b_id # Partner is carriage B
-    elevator_a_carriage.current_floor_idx = target_floor_idx + 1
-    elevator_a_carriage.double_min_floor_idx = target_floor_idx
-    elevator_a_carriage.double_max_floor_idx = NUM_FLOORS - 1
-    elevator_a_carriage.speed = 0.2
-    elevator_a_carriage.door_open = False # Ensure closed
-    elevator_a_carriage.passengers = set() # Ensure empty
-    # elevator_a_carriage.last_action_time = timestamp
-    # Reset SCHE/UPDATE specific fields just in case
-    elevator_a_carriage.sche_request_time = -1.0
-    elevator_a_carriage.update_request_time = -1.0
-
-
-    # Carriage B (original elevator B)
-    elevator_b.mode = ElevatorMode.DOUBLE_B
-    elevator_b.double_mode_role = 'B'
-    elevator_b.double_partner_id = a_id # Partner is carriage A
-    elevator_b.current_floor_idx = target_floor_idx - 1
-    elevator_b.double_min_floor_idx = 0
-    elevator_b.double_max_floor_idx = target_floor_idx
-    elevator_b.speed = 0.2
-    elevator_b.door_open = False # Ensure closed
-    elevator_b.passengers = set() # Ensure empty
-    # elevator_b.last_action_time = timestamp
-    # Reset SCHE/UPDATE specific fields
-    elevator_b.sche_request_time = -1.0
-    elevator_b.update_request_time = -1.0
+    # Partner is carriage B, serving the transfer floor and above
+    elevator_a_carriage.become_carriage(ElevatorMode.DOUBLE_A, 'A', b_id, target_floor_idx + 1,
+                                        target_floor_idx, NUM_FLOORS - 1)
+
+    # Carriage B (original elevator B), partner is carriage A, serving the transfer floor and below
+    elevator_b.become_carriage(ElevatorMode.DOUBLE_B, 'B', a_id, target_floor_idx - 1,
+                               0, target_floor_idx)
 
     # Validate initial positions after update
     if not (0 <= elevator_b.current_floor_idx < NUM_FLOORS):
@@ -832,12 +1045,30 @@ def check_update_end(timestamp: float, details: Dict[str, Any], state: SystemSta
     # state.elevators[b_id] represents carriage B.
 
 
+# Output action type -> check_* handler
+OUTPUT_HANDLERS = {
+    "ARRIVE": check_arrive,
+    "OPEN": check_open,
+    "CLOSE": check_close,
+    "IN": check_in,
+    "OUT": check_out,
+    "RECEIVE": check_receive,
+    "SCHE-ACCEPT": check_sche_accept,
+    "SCHE-BEGIN": check_sche_begin,
+    "SCHE-END": check_sche_end,
+    "UPDATE-ACCEPT": check_update_accept,
+    "UPDATE-BEGIN": check_update_begin,
+    "UPDATE-END": check_update_end,
+}
+
+
 def check_final_state(state: SystemState):
     """Checks conditions at the end of the output."""
-    # 1. All passengers completed
-    for p_id, passenger in state.passengers.items():
-        if passenger.status != PassengerStatus.COMPLETED:
-            fail(f"Final State Error: Passenger {p_id} did not complete successfully (status: {passenger.status.name})")
+    # 1. All passengers completed (sweep only to name the first one that did not)
+    if state.completed_passengers != len(state.passengers):
+        for p_id, passenger in state.passengers.items():
+            if passenger.status != PassengerStatus.COMPLETED:
+                fail(f"Final State Error: Passenger {p_id} did not complete successfully (status: {passenger.status.name})")
 
     # 2. All elevators doors closed and empty (except disabled)
     for e_id, elevator in state.elevators.items():
@@ -847,7 +1078,7 @@ def check_final_state(state: SystemState):
             if elevator.passengers:
                 fail(f"Final State Error: Elevator {e_id} ended with passengers inside: {elevator.passengers}")
 
-    # 3. Time limit check (already done line-by-line by check_timestamp)
+    # 3. Time limit check (already done line-by-line in judge())
     print("Final state checks passed.")
 
 
@@ -862,31 +1093,44 @@ def judge(input_filepath: str, output_filepath: str, max_time: float):
 
     # 2. Process Output File
     last_line = ""
+    # Per-line callables bound to locals once
+    parse = parse_output_line
+    get_handler = OUTPUT_HANDLERS.get
+    # The timestamp check runs on every line, so the last timestamp is kept in a local
+    # and written back to state after the loop (max_time is the argument stored above)
+    last_timestamp = state.last_timestamp
     try:
+        # Read in one go and split in C; text mode has already normalised newlines
         with open(output_filepath, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                last_line = line
-
-                parsed = parse_output_line(line)
-                if not parsed:
-                    fail(f"Output Error (Line {line_num}): Unknown or invalid format", line=line)
-
-                timestamp, action_type, details = parsed
-
-                # --- Core Validation Steps ---
-                # a. Check Timestamp
-                check_timestamp(timestamp, state, line)
-
-                # b. Check Action Validity and Update State
-                handler = globals().get(f"check_{action_type.lower().replace('-', '_')}")
-                if handler:
-                    handler(timestamp, details, state, line)
-                else:
-                    # Should not happen if parse_output_line is comprehensive
-                    fail(f"Internal Error: No handler for action type '{action_type}'", timestamp, line)
+            output_lines = f.read().split('\n')
+        for line_num, line in enumerate(output_lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            last_line = line
+
+            parsed = parse(line)
+            if not parsed:
+                fail(f"Output Error (Line {line_num}): Unknown or invalid format", line=line)
+
+            timestamp, action_type, details = parsed
+
+            # --- Core Validation Steps ---
+            # a. Check Timestamp
+            if timestamp < last_timestamp - TIME_PRECISION:
+                fail(f"Timestamp out of order. Current: {timestamp:.1f}, Previous: {last_timestamp:.1f}", timestamp, line)
+            if timestamp > max_time + TIME_PRECISION:
+                fail(f"Total run time {timestamp:.1f} exceeds limit {max_time:.1f}", timestamp, line)
+            last_timestamp = timestamp
+
+            # b. Check Action Validity and Update State
+            handler = get_handler(action_type)
+            if handler:
+                handler(timestamp, details, state, line)
+            else:
+                # Should not happen if parse_output_line is comprehensive
+                fail(f"Internal Error: No handler for action type '{action_type}'", timestamp, line)
+        state.last_timestamp = last_timestamp
 
     except FileNotFoundError:
         fail(f"Output file not found: {output_filepath}")
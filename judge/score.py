@@ -8,14 +8,17 @@ from typing import Dict, Optional, Tuple
 TIME_PRECISION = 1e-6
 
 # --- Parsing Patterns ---
-# Input pattern to get passenger request time and priority
-INPUT_PASSENGER_PATTERN = re.compile(r"\[(\d+\.\d+)\](\d+)-PRI-(\d+)-FROM-([A-Z0-9]+)-TO-([A-Z0-9]+)$")
+# Input pattern to get passenger request time and priority, scanned over the whole file
+# (one passenger per line, surrounding whitespace allowed)
+INPUT_PASSENGER_PATTERN = re.compile(r"^\s*\[(\d+\.\d+)\](\d+)-PRI-(\d+)-FROM-[A-Z0-9]+-TO-[A-Z0-9]+[^\S\n]*$", re.MULTILINE)
 
-# Output patterns to get completion time and action counts
-OUTPUT_OUT_S_PATTERN = re.compile(r"\[(\d+\.\d+)\]OUT-S-(\d+)-([A-Z0-9]+)-(\d+)$")
-OUTPUT_ACTION_PATTERN = re.compile(r"\[(\d+\.\d+)\](ARRIVE|OPEN|CLOSE)-.*") # General pattern for actions and final time
+# Output pattern to get completion times, action counts and final time, scanned over the whole file:
+# group 1 is the timestamp, then either group 2 (ARRIVE/OPEN/CLOSE) or group 3 (OUT-S passenger id)
+OUTPUT_EVENT_PATTERN = re.compile(r"^\s*\[(\d+\.\d+)\](?:(ARRIVE|OPEN|CLOSE)-|OUT-S-(\d+)-[A-Z0-9]+-\d+[^\S\n]*$)", re.MULTILINE)
 
 class PassengerScoreInfo:
+    __slots__ = ("request_time", "priority", "completion_time")
+
     def __init__(self, request_time: float, priority: int):
         self.request_time = request_time
         self.priority = priority
@@ -33,17 +36,15 @@ def calculate_score(input_filepath: str, output_filepath: str, real_time: Option
     # 1. Parse Input File for Passenger Info
     try:
         with open(input_filepath, 'r') as f:
-            for line in f:
-                match = INPUT_PASSENGER_PATTERN.match(line.strip())
-                if match:
-                    timestamp, p_id_str, prio_str, _, _ = match.groups()
-                    p_id = int(p_id_str)
-                    priority = int(prio_str)
-                    request_time = float(timestamp)
-                    if p_id in passengers:
-                        # This shouldn't happen with valid gen.py, but check anyway
-                        print(f"Warning: Duplicate passenger ID {p_id} found in input file.", file=sys.stderr)
-                    passengers[p_id] = PassengerScoreInfo(request_time=request_time, priority=priority)
+            for match in INPUT_PASSENGER_PATTERN.finditer(f.read()):
+                timestamp, p_id_str, prio_str = match.groups()
+                p_id = int(p_id_str)
+                priority = int(prio_str)
+                request_time = float(timestamp)
+                if p_id in passengers:
+                    # This shouldn't happen with valid gen.py, but check anyway
+                    print(f"Warning: Duplicate passenger ID {p_id} found in input file.", file=sys.stderr)
+                passengers[p_id] = PassengerScoreInfo(request_time=request_time, priority=priority)
     except FileNotFoundError:
         print(f"Error: Input file not found: {input_filepath}", file=sys.stderr)
         sys.exit(1)
@@ -58,43 +59,30 @@ def calculate_score(input_filepath: str, output_filepath: str, real_time: Option
     # 2. Parse Output File for Completion Times and Action Counts
     try:
         with open(output_filepath, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Check for OUT-S first
-                out_match = OUTPUT_OUT_S_PATTERN.match(line)
-                if out_match:
-                    timestamp_str, p_id_str, _, _ = out_match.groups()
-                    timestamp = float(timestamp_str)
-                    p_id = int(p_id_str)
-
-                    if p_id in passengers:
-                        # Record the *first* completion time for a passenger
-                        if passengers[p_id].completion_time is None:
-                            passengers[p_id].completion_time = timestamp
-                    else:
-                        # Passenger in output but not input? Judge should have caught this.
-                        print(f"Warning: OUT-S for passenger {p_id} found in output, but not in input.", file=sys.stderr)
-
-                    # Update t_final based on this action
-                    t_final = max(t_final, timestamp)
-                    continue # Move to next line after processing OUT-S
-
-                # Check for general actions (ARRIVE, OPEN, CLOSE) and update t_final
-                action_match = OUTPUT_ACTION_PATTERN.match(line)
-                if action_match:
-                    timestamp_str, action_type = action_match.groups()
-                    timestamp = float(timestamp_str)
-                    t_final = max(t_final, timestamp) # Update final timestamp
+            for match in OUTPUT_EVENT_PATTERN.finditer(f.read()):
+                timestamp_str, action_type, p_id_str = match.groups()
+                timestamp = float(timestamp_str)
+                t_final = max(t_final, timestamp) # Update final timestamp
 
+                # Count general actions (ARRIVE, OPEN, CLOSE)
+                if action_type is not None:
                     if action_type == "ARRIVE":
                         arrive_count += 1
                     elif action_type == "OPEN":
                         open_count += 1
-                    elif action_type == "CLOSE":
+                    else:
                         close_count += 1
+                    continue
+
+                # OUT-S
+                p_id = int(p_id_str)
+                if p_id in passengers:
+                    # Record the *first* completion time for a passenger
+                    if passengers[p_id].completion_time is None:
+                        passengers[p_id].completion_time = timestamp
+                else:
+                    # Passenger in output but not input? Judge should have caught this.
+                    print(f"Warning: OUT-S for passenger {p_id} found in output, but not in input.", file=sys.stderr)
 
     except FileNotFoundError:
         print(f"Error: Output file not found: {output_filepath}", file=sys.stderr)
@@ -1,10 +1,4 @@
-
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-
-app = FastAPI(docs_url=None, redoc_url=None)  # 禁用文档接口
+import gzip
 
 # 简单的维护页面HTML
 MAINTENANCE_HTML = """
@@ -49,11 +43,53 @@ MAINTENANCE_HTML = """
 </html>
 """
 
-# 拦截所有请求返回维护页面
-@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"])
-async def maintenance_page():
-    return HTMLResponse(content=MAINTENANCE_HTML, status_code=503)
+# 维护页面响应内容固定，启动时编码（及 gzip 压缩）一次并预先构造响应头，所有请求复用
+MAINTENANCE_BODY = MAINTENANCE_HTML.encode("utf-8")
+MAINTENANCE_GZIP_BODY = gzip.compress(MAINTENANCE_BODY, 9)
+
+def build_headers(body, extra=()):
+    return [
+        (b"content-type", b"text/html; charset=utf-8"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+        (b"vary", b"accept-encoding"),
+        *extra,
+    ]
+
+MAINTENANCE_HEADERS = build_headers(MAINTENANCE_BODY)
+MAINTENANCE_GZIP_HEADERS = build_headers(MAINTENANCE_GZIP_BODY, [(b"content-encoding", b"gzip")])
+
+def accepts_gzip(scope):
+    # 逐项解析 Accept-Encoding，编码名须恰为 gzip，q=0 表示客户端明确拒绝
+    for name, value in scope.get("headers", ()):
+        if name != b"accept-encoding":
+            continue
+        for item in value.split(b","):
+            coding, *params = item.split(b";")
+            if coding.strip().lower() != b"gzip":
+                continue
+            q = 1.0
+            for param in params:
+                key, _, q_value = param.partition(b"=")
+                if key.strip().lower() == b"q":
+                    try:
+                        q = float(q_value)
+                    except ValueError:
+                        q = 0.0  # 无法解析的 q 值按拒绝处理
+            return q > 0
+    return False
+
+# 直接以 ASGI 应用拦截所有请求返回维护页面，不经过框架路由
+async def app(scope, receive, send):
+    if scope["type"] != "http": # 不处理 websocket 等其他连接
+        return
+    # 客户端支持时返回预压缩的正文
+    if accepts_gzip(scope):
+        headers, body = MAINTENANCE_GZIP_HEADERS, MAINTENANCE_GZIP_BODY
+    else:
+        headers, body = MAINTENANCE_HEADERS, MAINTENANCE_BODY
+    await send({"type": "http.response.start", "status": 503, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8082)
+    uvicorn.run(app, host="0.0.0.0", port=8082, lifespan="off")
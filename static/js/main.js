@@ -75,72 +75,104 @@ document.addEventListener('DOMContentLoaded', function() {
     const runButton = document.getElementById('run-button');
     const customRunButton = document.getElementById('custom-run-button');
     
-    function updateRunningStatus() {
-        if (terminalOutput) {
-            fetch('/running_status')
-                .then(response => response.json())
-                .then(data => {
-                    if (data.is_running) {
-                        // 更新终端输出
-                        let outputHtml = '';
-                        data.output.forEach(line => {
-                            outputHtml += line + '\n';
-                        });
-                        terminalOutput.textContent = outputHtml;
-                        terminalOutput.scrollTop = terminalOutput.scrollHeight;
-                        
-                        // 禁用所有运行按钮
-                        if (runButton) {
-                            runButton.disabled = true;
-                            runButton.textContent = '运行中...';
-                        }
-                        if (customRunButton) {
-                            customRunButton.disabled = true;
-                            customRunButton.textContent = '运行中...';
-                        }
-                        
-                        // 继续轮询
-                        setTimeout(updateRunningStatus, 1000);
-                    } else {
-                        // 如果有输出但不是运行中，则可能刚刚结束
-                        if (data.output && data.output.length > 0) {
-                            let outputHtml = '';
-                            data.output.forEach(line => {
-                                outputHtml += line + '\n';
-                            });
-                            terminalOutput.textContent = outputHtml;
-                            terminalOutput.scrollTop = terminalOutput.scrollHeight;
-                        }
-                        
-                        // 启用所有运行按钮
-                        if (runButton) {
-                            runButton.disabled = false;
-                            runButton.textContent = '运行';
-                        }
-                        if (customRunButton) {
-                            customRunButton.disabled = false;
-                            customRunButton.textContent = '运行';
-                        }
-                    }
-                })
-                .catch(error => {
-                    console.error('获取运行状态时出错:', error);
-                    // 出错时也要启用所有按钮
-                    if (runButton) {
-                        runButton.disabled = false;
-                        runButton.textContent = '运行';
-                    }
-                    if (customRunButton) {
-                        customRunButton.disabled = false;
-                        customRunButton.textContent = '运行';
-                    }
-                });
+    // 已接收的输出行及日志读取位置，轮询时只拉取新增部分
+    const MAX_OUTPUT_LINES = 2000;
+    let outputLines = [];
+    let outputLog = null;
+    let outputOffset = -1;
+    
+    function renderOutput(data) {
+        if (data.log !== outputLog) {
+            // 首次拉取或已开始新一轮运行
+            outputLines = [];
+            outputLog = data.log;
+        }
+        if (data.data) {
+            const lines = data.data.split('\n');
+            if (lines[lines.length - 1] === '') {
+                lines.pop();
+            }
+            outputLines = outputLines.concat(lines);
+        }
+        if (outputLines.length > MAX_OUTPUT_LINES) {
+            outputLines = outputLines.slice(-MAX_OUTPUT_LINES);
+        }
+        outputOffset = data.offset;
+        
+        let outputHtml = '';
+        outputLines.forEach(line => {
+            outputHtml += line + '\n';
+        });
+        terminalOutput.textContent = outputHtml;
+        terminalOutput.scrollTop = terminalOutput.scrollHeight;
+    }
+    
+    function setRunButtons(isRunning) {
+        [runButton, customRunButton].forEach(btn => {
+            if (btn) {
+                btn.disabled = isRunning;
+                btn.textContent = isRunning ? '运行中...' : '运行';
+            }
+        });
+    }
+    
+    function handleStatus(data) {
+        if (data.is_running) {
+            // 更新终端输出并禁用所有运行按钮
+            renderOutput(data);
+            setRunButtons(true);
+        } else {
+            // 如果有输出但不是运行中，则可能刚刚结束
+            if (data.data) {
+                renderOutput(data);
+            }
+            setRunButtons(false);
         }
+        return data.is_running;
+    }
+    
+    function statusQuery() {
+        return '?log=' + encodeURIComponent(outputLog || '') + '&offset=' + outputOffset;
+    }
+    
+    function updateRunningStatus() {
+        fetch('/running_status' + statusQuery())
+            .then(response => response.json())
+            .then(data => {
+                if (handleStatus(data)) {
+                    // 继续轮询
+                    setTimeout(updateRunningStatus, 1000);
+                }
+            })
+            .catch(error => {
+                console.error('获取运行状态时出错:', error);
+                // 出错时也要启用所有按钮
+                setRunButtons(false);
+            });
+    }
+    
+    function streamRunningStatus() {
+        // 服务器推送新增输出，运行结束后服务器关闭连接
+        const source = new EventSource('/running_status_stream' + statusQuery());
+        source.onmessage = function(e) {
+            if (!handleStatus(JSON.parse(e.data))) {
+                source.close();
+            }
+        };
+        source.onerror = function() {
+            // 连接中断时退回轮询，从已收到的位置继续
+            source.close();
+            updateRunningStatus();
+        };
     }
     
-    // 如果存在终端输出元素，开始轮询
+    // 如果存在终端输出元素，开始接收运行状态
     if (terminalOutput) {
-        updateRunningStatus();
+        if (window.EventSource) {
+            streamRunningStatus();
+        } else {
+            updateRunningStatus();
+        }
     }
 
     // 模式切换功能
@@ -0,0 +1,139 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# app.py 使用相对路径的 program/ 和 log/，在临时目录中导入并运行
+app_module = None
+_old_cwd = None
+_tmp_dir = None
+
+
+def setUpModule():
+    global app_module, _old_cwd, _tmp_dir
+    _old_cwd = os.getcwd()
+    _tmp_dir = tempfile.TemporaryDirectory()
+    os.chdir(_tmp_dir.name)
+    sys.path.insert(0, REPO_DIR)
+    import app
+    app_module = app
+
+
+def tearDownModule():
+    os.chdir(_old_cwd)
+    sys.path.remove(REPO_DIR)
+    _tmp_dir.cleanup()
+
+
+class AppTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app_module = app_module
+        cls.client = app_module.app.test_client()
+
+    def setUp(self):
+        self.app_module.app.config['MAX_CONTENT_LENGTH'] = 1000
+
+    def tearDown(self):
+        self.app_module.app.config['MAX_CONTENT_LENGTH'] = self.app_module.MAX_FILE_SIZE
+
+
+class UploadStreamTest(AppTestCase):
+    def test_put_within_limit(self):
+        response = self.client.put('/upload/small.jar', data=b'x' * 500)
+        self.assertEqual(response.status_code, 201)
+        with open(os.path.join('program', 'small.jar'), 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 500)
+        self.assertEqual(os.listdir('program'), ['small.jar'])
+        mode = os.stat(os.path.join('program', 'small.jar')).st_mode & 0o777
+        self.assertEqual(mode, self.app_module.DEFAULT_FILE_MODE)
+        os.remove(os.path.join('program', 'small.jar'))
+
+    def test_existing_file_is_not_overwritten(self):
+        # 检查之后才出现的同名文件（并发上传）也不会被覆盖
+        file_path = os.path.join('program', 'race.jar')
+        with open(file_path, 'wb') as f:
+            f.write(b'first')
+        with self.assertRaises(FileExistsError):
+            self.app_module.save_stream(io.BytesIO(b'second'), file_path)
+        with open(file_path, 'rb') as f:
+            self.assertEqual(f.read(), b'first')
+        self.assertEqual(os.listdir('program'), ['race.jar'])
+        # 路由中的存在性检查通过后才冲突时返回 409
+        with mock.patch.object(self.app_module.os.path, 'exists', return_value=False):
+            response = self.client.put('/upload/race.jar', data=b'second')
+        self.assertEqual(response.status_code, 409)
+        os.remove(file_path)
+
+    def test_put_oversized_is_rejected(self):
+        response = self.client.put('/upload/big.jar', data=b'x' * 5000)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(os.listdir('program'), [])
+
+    def test_put_without_length_is_rejected(self):
+        # 分块上传（如 curl -T -）没有 Content-Length
+        response = self.client.put('/upload/chunked.jar', input_stream=io.BytesIO(b'x' * 10),
+                                   headers={'Transfer-Encoding': 'chunked'})
+        self.assertEqual(response.status_code, 411)
+        self.assertEqual(os.listdir('program'), [])
+
+    def test_oversized_stream_leaves_no_file(self):
+        # Content-Length 不可信时，写盘过程本身也要按限制中止
+        file_path = os.path.join('program', 'lying.jar')
+        with self.assertRaises(self.app_module.RequestEntityTooLarge):
+            self.app_module.save_stream(io.BytesIO(b'x' * 5000), file_path)
+        self.assertEqual(os.listdir('program'), [])
+
+
+class RunLogTest(AppTestCase):
+    def test_old_run_logs_are_pruned(self):
+        created = []
+        for _ in range(self.app_module.RUN_LOG_KEEP + 3):
+            log_file = self.app_module.new_run_log()
+            open(log_file, 'w').close()
+            created.append(log_file)
+        self.app_module.running_status['log_file'] = None
+        # 同一秒内的多次运行也不重名
+        self.assertEqual(len(set(created)), len(created))
+        remaining = sorted(f for f in os.listdir('log') if f.startswith('run-'))
+        self.assertEqual(remaining, sorted(os.path.basename(f) for f in created[-self.app_module.RUN_LOG_KEEP:]))
+
+    def test_run_log_failure_is_reported(self):
+        # 创建日志出错也在 try 内处理，运行状态照常复位
+        with mock.patch.object(self.app_module.os, 'scandir', side_effect=OSError('scandir failed')):
+            self.app_module.run_script(1, 1, 1, 1, 0, 0)
+        self.assertFalse(self.app_module.running_status['is_running'])
+        self.assertTrue(self.app_module.run_finished.is_set())
+        with open(self.app_module.running_status['log_file'], encoding='utf-8') as f:
+            self.assertIn('scandir failed', f.read())
+        self.app_module.running_status['log_file'] = None
+
+
+class RunWorkerTest(AppTestCase):
+    def test_failed_job_does_not_stop_worker(self):
+        def failing_job():
+            self.app_module.running_status['is_running'] = True
+            self.app_module.run_finished.clear()
+            raise RuntimeError('boom')
+
+        self.assertTrue(self.app_module.submit_run(failing_job))
+        self.assertTrue(self.app_module.run_finished.wait(5))
+
+        # 出错的任务结束后仍可提交新任务，并由同一个工作线程执行
+        done = threading.Event()
+        for _ in range(50):
+            if self.app_module.submit_run(done.set):
+                break
+            done.wait(0.1)
+        self.assertTrue(done.wait(5))
+        self.assertFalse(self.app_module.running_status['is_running'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import asyncio
+import gzip
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import maintenance
+
+
+def request(headers):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': headers}
+    asyncio.run(maintenance.app(scope, None, send))
+    start, body = messages
+    return start['status'], dict(start['headers']), body['body']
+
+
+class MaintenancePageTest(unittest.TestCase):
+    def test_gzip_accepted(self):
+        status, headers, body = request([(b'accept-encoding', b'deflate, gzip;q=0.5')])
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b'content-encoding'], b'gzip')
+        self.assertEqual(gzip.decompress(body), maintenance.MAINTENANCE_BODY)
+
+    def test_missing_header(self):
+        status, headers, body = request([])
+        self.assertEqual(status, 503)
+        self.assertNotIn(b'content-encoding', headers)
+        self.assertEqual(body, maintenance.MAINTENANCE_BODY)
+
+    def test_gzip_refused_with_q_zero(self):
+        for value in (b'gzip;q=0', b'gzip; q=0.0, identity', b'x-gzip, br'):
+            with self.subTest(value=value):
+                _, headers, body = request([(b'accept-encoding', value)])
+                self.assertNotIn(b'content-encoding', headers)
+                self.assertEqual(body, maintenance.MAINTENANCE_BODY)
+
+
+if __name__ == '__main__':
+    unittest.main()